@@ -0,0 +1,93 @@
+"""
+Module for adapting the number of in-flight requests to server load (AIMD). See details in method specification below.
+Concurrency is increased by 1 after every window of healthy requests (additive increase)
+and halved on throttling/server errors (429, 5xx, connection errors) or when p95 latency rises (multiplicative decrease).
+"""
+
+import threading
+from collections import deque
+from time import time as t
+
+class AdaptiveConcurrency(object):
+    """
+    AdaptiveConcurrency object for limiting the number of in-flight requests.
+    Thread-safe; every request must call acquire() before and release() after it is sent.
+    """
+    def __init__(self, initial=4, minimum=1, maximum=32, latency_target=5.0, window=20):
+        """
+        :param initial: int, starting number of in-flight requests
+        :param minimum: int, minimum number of in-flight requests
+        :param maximum: int, maximum number of in-flight requests
+        :param latency_target: float, p95 latency in seconds above which concurrency is decreased
+        :param window: int, number of completed requests between increases
+        """
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.window = window
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.completed = 0
+        self.last_decrease = 0
+        self.peak = 0 # highest number of in-flight requests since last adjustment
+        self.samples = list()
+        self.recent = deque(maxlen=200) # latencies of recent requests, for reporting
+        self.baseline = None # lowest observed p95 latency
+        self.start = t()
+    def acquire(self):
+        """
+        Blocks until a request may be sent.
+        """
+        with self.condition:
+            while self.in_flight >= int(self.limit): self.condition.wait()
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+    def release(self, elapsed, status):
+        """
+        Records completed request and adjusts concurrency.
+        :param elapsed: float, latency of request in seconds
+        :param status: int, HTTP status code of response, 0 if request failed without response
+        """
+        with self.condition:
+            self.in_flight -= 1
+            self.completed += 1
+            self.recent.append(elapsed)
+            if status == 0 or status == 429 or status >= 500: self.decrease()
+            else:
+                self.samples.append(elapsed)
+                if len(self.samples) >= self.window:
+                    p95 = percentile(self.samples, 0.95)
+                    if self.baseline is None or p95 < self.baseline: self.baseline = p95
+                    if p95 > self.latency_target or p95 > 3 * self.baseline: self.decrease()
+                    elif self.peak >= int(self.limit): self.limit = min(self.maximum, self.limit + 1) # increases only if limit was reached
+                    self.samples = list()
+                    self.peak = self.in_flight
+            self.condition.notify_all()
+    def decrease(self):
+        """
+        Halves concurrency, at most once per round of in-flight requests. Caller must hold the condition lock.
+        """
+        if self.completed - self.last_decrease < self.limit: return
+        self.limit = max(self.minimum, self.limit / 2)
+        self.last_decrease = self.completed
+        self.samples = list()
+    def getLimit(self): return int(self.limit)
+    def report(self):
+        """
+        Summarizes current state of controller.
+        :return: str, current concurrency, throughput and p95 latency of recent requests
+        """
+        with self.condition:
+            p95 = percentile(self.recent, 0.95) * 1000 if self.recent else 0.0
+            return "concurrency {}, {:.1f} requests/s, p95 {:.0f} ms".format(int(self.limit), self.completed / (t() - self.start), p95)
+
+def percentile(values, fraction):
+    """
+    Computes percentile of values.
+    :param values: iterable of numbers
+    :param fraction: float, percentile as fraction (0.95 for p95)
+    :return: percentile value
+    """
+    values = sorted(values)
+    return values[int(fraction * (len(values) - 1))]
@@ -11,6 +11,9 @@ import sqlite3
 from time import time as t
 from tagSimilarity import tagSimilarity
 from tagRelevance import tagRelevance
+from batchWriter import BatchWriter
+from tagDictionary import getDictionary, writeRelations
+from schema import migrate
 
 start = t()
 """
@@ -18,33 +21,8 @@ SQL table schema.
 """
 connection = sqlite3.connect("articles.sqlite")
 cursor = connection.cursor()
-cursor.executescript("""
-    CREATE TABLE IF NOT EXISTS Articles (
-    id          INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT UNIQUE,
-    idnum       INTEGER UNIQUE,
-    address     TEXT,
-    section     TEXT,
-    author      TEXT,
-    coauthors   TEXT,
-    time        TEXT,
-    title       TEXT,
-    label       TEXT,
-    lead        TEXT,
-    content     TEXT,
-    important   TEXT,
-    tags        INTEGER,
-    similarity  INTEGER,
-    relevance   REAL);
-
-    CREATE TABLE IF NOT EXISTS Tags (
-    id          INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT UNIQUE,
-    tag         TEXT);
-
-    CREATE TABLE IF NOT EXISTS Relations (
-    id_article  INTEGER,
-    id_tag      INTEGER,
-    PRIMARY KEY (id_article, id_tag))
-    """)
+migrate(connection) # see module schema
+batch = BatchWriter(connection) # commits every 100 articles or 5 seconds
 """
 Parsing of articles from XLS file.
 """
@@ -121,21 +99,14 @@ for row in articles.iter_rows(row_offset=1):
                                                             relevance))
         cursor.execute("SELECT id FROM Articles WHERE idnum = ?", (id,))
         id_article = cursor.fetchone()[0]
-        for tag in tags:
-            cursor.execute("SELECT EXISTS (SELECT 1 FROM Tags WHERE tag = ?)", (tag,))
-            if cursor.fetchone()[0] == 0:
-                cursor.execute("INSERT INTO Tags (tag) VALUES (?)", (tag,))
-                cursor.execute("SELECT id FROM Tags WHERE tag = ?", (tag,))
-                id_tag = cursor.fetchone()[0]
-                cursor.execute("INSERT OR REPLACE INTO Relations (id_article, id_tag) VALUES (?, ?)", (id_article, id_tag))
-            else:
-                cursor.execute("SELECT id FROM Tags WHERE tag = ?", (tag,))
-                id_tag = cursor.fetchone()[0]
-                cursor.execute("INSERT OR REPLACE INTO Relations (id_article, id_tag) VALUES (?, ?)", (id_article, id_tag))
-        connection.commit()
+        writeRelations(cursor, id_article, tags)
+        batch.written()
         counter += 1
         if counter % 100 == 0: print(counter)
     else: counter += 1
+batch.commit()
 connection.close()
 
+print(batch.report())
+print(getDictionary(cursor).report())
 print("Finished in %s seconds." % "{0:.3f}".format(t() - start))
\ No newline at end of file
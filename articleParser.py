@@ -0,0 +1,214 @@
+"""
+Module for parsing article and comments data from Siol.net article websites. See details in method specification below.
+Dependencies: modules records, tagRelevance, tagSimilarity
+"""
+
+import re
+from datetime import date
+from time import time as t
+from records import Article, Comment
+from tagSimilarity import tagSimilarity
+from tagRelevance import tagRelevance
+
+# elements read by getArticle: (tag name, class) -> field; class None matches any element with tag name,
+# class with spaces matches only elements with exactly these classes
+FIELDS = {("h1", None): "title",
+          ("span", "article__author"): "authors",
+          ("div", "article__pr_box"): "pr_box",
+          ("span", "article__publish_date--date"): "date",
+          ("span", "article__publish_date--time"): "time",
+          ("span", "article__overtitle"): "label",
+          ("div", "article__intro js_articleIntro"): "lead",
+          ("div", "article__main js_article js_bannerInArticleWrap"): "content",
+          ("a", "article__tags--tag"): "tags",
+          ("div", "article__views"): "views",
+          ("span", "article__total_shares"): "shares",
+          ("span", "comments__post_count"): "comments",
+          ("div", "article__hotness"): "hotness"}
+
+timings = dict() # field -> total extraction time in seconds
+timed = [0] # number of timed articles
+
+# functions
+def lap(field, start):
+    """
+    Adds time elapsed since start to timing of field.
+    :param field: str, name of field
+    :param start: float, start time
+    :return: float, current time
+    """
+    now = t()
+    timings[field] = timings.get(field, 0.0) + now - start
+    return now
+
+def timingReport():
+    """
+    Summarizes extraction time per field.
+    :return: str, average time per article and share of total time for every field
+    """
+    total = sum(timings.values())
+    if not timed[0] or not total: return "No articles timed."
+    return "Extraction time per article:\n" + "\n".join("    {}: {:.3f} ms ({:.1f} %)".format(field, seconds * 1000 / timed[0], seconds * 100 / total) for field, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True))
+
+def walkArticle(soup):
+    """
+    Collects elements of all article fields in a single walk of the parsed tree.
+    :param soup: BS4 soup object
+    :return: dict, field -> list of elements in document order (views_fallback: elements with article__views in class)
+    """
+    elements = {field: list() for field in FIELDS.values()}
+    elements["views_fallback"] = list()
+    for element in soup.find_all(True):
+        classes = element.get("class") or []
+        if isinstance(classes, str): classes = classes.split()
+        keys = {(element.name, None), (element.name, " ".join(classes))}
+        keys.update((element.name, item) for item in classes)
+        for key in keys:
+            if key in FIELDS: elements[FIELDS[key]].append(element)
+        if "article__views" in " ".join(classes): elements["views_fallback"].append(element)
+    return elements
+
+def first(elements):
+    """
+    :param elements: list, elements
+    :return: first element or None if list is empty
+    """
+    return elements[0] if elements else None
+
+def getArticle(address, content, Article):
+    """
+    Gets article data from parsed HTML string and creates am Article object.
+    Elements of all fields are collected in a single walk of the tree; extraction time of every field is added to timings.
+    :param address: str, article URL
+    :param content: BS4 soup object
+    :param Article: Article class
+    :return: Article object
+    """
+    start = t()
+    # article ID
+    id = int(re.findall("\d+$", address)[0])
+    # section of article
+    try: section = re.findall("\.net/(.+)/", address)[0]
+    except IndexError: section = ""
+    # elements of parsed article content
+    elements = walkArticle(content)
+    start = lap("walk", start)
+    # author(s) of article
+    authors = list()
+    authors.extend([author[:-1] if author[-1] == "," else author for author in re.findall("/\">(.+)", str(elements["authors"]))])
+    try: authors.insert(0, re.findall("<span>(.*?)</span>", str(elements["pr_box"]))[0])
+    except IndexError: pass
+    if not authors: authors = [""]
+    if len(authors) > 1: coauthors = ", ".join(authors[1:])
+    else: coauthors = ""
+    authors = authors[0]
+    start = lap("author", start)
+    # publication date of artice
+    time = "-".join(reversed([datum if len(datum) > 1 else "0" + datum for datum in re.findall("(\d+)", first(elements["date"]).getText())]))
+    # publication hour of article
+    hour = ":".join([datum if len(datum) > 1 else "0" + datum for datum in re.findall("(\d+)", first(elements["time"]).getText())]) + ":00"
+    start = lap("date", start)
+    # article title
+    title = re.findall(">(.*)<", str(elements["title"][0]))[0]
+    # article label
+    try: label = first(elements["label"]).getText()
+    except AttributeError: label = ""
+    # article lead, text only, no urls
+    try: lead = re.sub("<.+?>", "", re.sub(r"\n\s{2,}", "", first(elements["lead"]).getText()))
+    except IndexError: lead = ""
+    start = lap("title, label, lead", start)
+    # main article content, text and headlines only, no urls, iframes, and important text (text in italic or bold), in a single pass
+    try: content_lines = first(elements["content"]).find_all("p")
+    except RuntimeError: content_lines = []
+    content = str()
+    important_set = set()
+    pattern = re.compile("<.+?>")
+    important_pattern = re.compile("<[se][tm]\w*>(.+?)</") # finds <strong> and <em> tags
+    for line in content_lines:
+        if "<div" not in line and "</div>" not in line and "<a href" not in line and "iframe" not in line:
+            content += re.sub(pattern, "", line.getText()) + "\n"
+            for item in re.findall(important_pattern, str(line)): important_set.add(item.replace("\xa0", " "))
+    content = re.sub(r"\n{2,}", "\n", content) # replaces multiple \n with single \n
+    important = ", ".join(important_set)
+    start = lap("content, important", start)
+    # entire article
+    all = title + "\n\n" + label + "\n\n" + lead + "\n\n" + content
+    # article tags
+    tags = [tag.getText() for tag in elements["tags"]]
+    # number of tags
+    tag_number = len(tags)
+    start = lap("tags", start)
+    # tag similarity index
+    similarity = tagSimilarity(tags)
+    start = lap("similarity", start)
+    # tag relevance index
+    relevance = tagRelevance(tags, important, all)
+    start = lap("relevance", start)
+    # article views
+    try: pageviews = int(re.findall(r"\d+", str(elements["views"]))[0])
+    except IndexError:
+        try: pageviews = int(re.findall(r"\d+", re.findall(r"article__views.+<\/div>", str(first(elements["views_fallback"]).parent))[0])[0])
+        except (IndexError, AttributeError): pageviews = 0
+    # article shares
+    try: shares = int(re.findall(r"\d+", str(elements["shares"]))[0])
+    except IndexError: shares = 0
+    # article comments number
+    try: comments_number = int(re.findall(r"\d+", str(elements["comments"]))[0])
+    except IndexError: comments_number = 0
+    # article hotness
+    try: hotness = float(first(elements["hotness"]).find("span").getText().replace(",", "."))
+    except (IndexError, AttributeError) as e: hotness = 0.0
+    start = lap("views, shares, comments, hotness", start)
+    # refresh time of article data in database (last data update)
+    refreshed = str(date.today())
+    timed[0] += 1
+    return Article(id, address, section, authors, coauthors, time, hour, title, label, lead, content, important, tags, tag_number, similarity, relevance, pageviews, shares, comments_number, hotness, refreshed)
+
+def getComments(address, content, level, Comment):
+    """
+    Gets comments data from parsed HTML string and creates a Comment object.
+    Every thread (comment and its replies) is walked once; usernames, texts, timestamps and votes are collected in document order and zipped.
+    :param address: str, article URL
+    :param content: BS4 element tag
+    :param level: bool, True if comments on article page, False if separate page comments
+    :param Comment: Comment class
+    :return: list, Comment objects
+    """
+    comments = list()
+    if level: comments_data = content.find_all("span", class_="comments__inner comments__inner--toplevel cf js_oneComment")
+    else: comments_data = content.find_all("div", class_="comments__inner comments__inner--toplevel js_oneComment")
+    for comment_data in comments_data:
+        users, texts, date_times, votes = list(), list(), list(), list()
+        for element in comment_data.find_all(True):
+            classes = element.get("class") or []
+            if isinstance(classes, str): classes = classes.split()
+            if element.name == "span" and "comments__username" in classes: users.append(element.getText())
+            elif element.name == "p" and "comments__text" in classes: texts.append(element.getText())
+            elif element.name == "span" and "comments__timestamp" in classes: date_times.append(element.getText())
+            elif element.name == "span" and "vote_count" in classes: votes.append(element.getText())
+        first_comment = None
+        for i, user in enumerate(users):
+            text = texts[i]
+            date_time = date_times[i]
+            date = "-".join(re.findall(r"\d+(?=\.)", date_time)[::-1])
+            time = re.findall(r"(?<=ob\s).+", date_time)[0] + ":00"
+            try:
+                up = int(votes[i*2])
+                down = int(votes[i*2+1])
+            except IndexError:
+                up = None
+                down = None
+            comment_object = Comment(address, user, text, date, time, up, down)
+            if i == 0: first_comment = comment_object.getHashValue()
+            else: comment_object.setReplyTo(first_comment)
+            comments.append(comment_object)
+    return comments
+
+def commentRows(id_article, comments):
+    """
+    Creates rows for inserting comments into Comments table with executemany.
+    :param id_article: int, ID of article in database
+    :param comments: list, Comment objects
+    :return: list, (id_article, address, user, text, date, time, up, down, reply_to, hash_value) tuples
+    """
+    return [comment.getRow(id_article) for comment in comments]
@@ -0,0 +1,305 @@
+"""
+Module for processing articles in stages. See details in method specification below.
+    fetchers   threads fetching article and comments pages (module concurrentFetch)
+    parsers    processes parsing pages and scoring articles (ParserPool), returning Article and Comment objects
+    writer     single thread owning the database connection (Writer)
+Stages are connected with bounded queues, so memory use stays flat on large lists of URLs.
+If an archive is given to ParserPool, every fetched article and comments page is stored in it (see module htmlArchive).
+If dead letters are given to ParserPool, pages that fail to parse are saved to them with the exception (see module deadLetters)
+and reported as ExtractionError, so that one bad page does not stop a run.
+Every item is written by Writer in its own savepoint; an item that fails is rolled back alone and skipped, and its archived
+article page is saved to dead letters, so that articles written before it in the same batch are kept.
+Worker processes import the main module on Windows (and with spawn/forkserver start methods), so scripts using
+ParserPool must run their main code under if __name__ == "__main__".
+"""
+
+import os
+import queue
+import re
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from time import time as t
+import articleParser
+from articleParser import getArticle, getComments, lap
+from batchWriter import BatchWriter
+from tagDictionary import getDictionary
+from concurrentFetch import fetchOrdered
+from httpClient import client
+from parserBackend import parseArticle, parseComments
+from records import Article, Comment
+
+def articlePage(address, html, backend):
+    """
+    Parses article page and scores article (runs in worker process).
+    :param address: str, article URL
+    :param html: str, HTML of article page
+    :param backend: str, name of parser backend
+    :return: tuple (Article object, list of Comment objects from article page, URL of dedicated comments website or None, dict of extraction timings)
+    """
+    articleParser.timings.clear()
+    articleParser.timed[0] = 0
+    parse_start = t()
+    soup = parseArticle(html, backend)
+    lap("parse", parse_start)
+    article = getArticle(address, soup, Article)
+    comments_soup = soup.find("ul", class_="comments__list cf")
+    comments = getComments(address, comments_soup, True, Comment) if comments_soup else [] # gets 3 comments from article page, which contain votes
+    comments_url = None
+    if soup.find_all("div", class_="comments__show_all"): comments_url = "https://siol.net" + soup.find_all("a", class_="comments__show_all--button")[0].get("href")
+    return article, comments, comments_url, dict(articleParser.timings)
+
+def commentsPage(address, html, backend):
+    """
+    Parses page of dedicated comments website (runs in worker process).
+    :param address: str, article URL
+    :param html: str, HTML of comments page
+    :param backend: str, name of parser backend
+    :return: tuple (list of Comment objects, number of pages of dedicated comments website)
+    """
+    soup = parseComments(html, backend)
+    pages = 1
+    for url in reversed(soup.find_all("li", class_="pagination__item")): # looks for possible URLs from multiple comments pages listed on a dedicated comments page
+        page = url.find("a").getText()
+        if page:
+            pages = int(page)
+            break
+    return getComments(address, soup.find("ul", class_="comments__list cf "), False, Comment), pages
+
+class ExtractionError(Exception):
+    """
+    Raised when data cannot be extracted from a page, which was saved to dead letters.
+    """
+    def __init__(self, error):
+        """
+        :param error: exception raised by parser
+        """
+        Exception.__init__(self, "{}: {}".format(type(error).__name__, error))
+        self.error = error
+    def getError(self): return self.error
+
+class ParserPool(object):
+    """
+    ParserPool object for parsing pages and scoring articles in worker processes.
+    """
+    def __init__(self, backend, processes=None, window=64, archive=None, dead_letters=None):
+        """
+        :param backend: str, name of parser backend
+        :param processes: int, number of worker processes, number of CPU cores if None
+        :param window: int, maximum number of article pages waiting for or in parsing
+        :param archive: HTMLArchive object for storing fetched pages, None if pages are not stored
+        :param dead_letters: DeadLetters object for saving pages that fail to parse, None if parser errors are raised
+        """
+        self.backend = backend
+        self.archive = archive
+        self.dead_letters = dead_letters
+        self.processes = processes or os.cpu_count() or 1
+        self.window = window
+        self.pool = ProcessPoolExecutor(self.processes)
+    def parsed(self, future, address, url, kind, page, html):
+        """
+        Gets result of parsing; a page that fails to parse is saved to dead letters.
+        :param future: Future object of parsing
+        :param address: str, article URL
+        :param url: str, page URL
+        :param kind: str, article or comments
+        :param page: int, page number (comments pages)
+        :param html: str, HTML of page
+        :return: result of parsing function
+        :raises ExtractionError: if page fails to parse and dead letters are given
+        """
+        try: return future.result()
+        except BrokenExecutor: raise # worker process died, every further page would fail
+        except Exception as e:
+            if self.dead_letters is None: raise
+            self.dead_letters.record(address, url, kind, page, e, html)
+            raise ExtractionError(e)
+    def articles(self, pages):
+        """
+        Parses fetched article pages concurrently; results are yielded in input order.
+        :param pages: iterable of (URL, HTML of article or None if article does not exist, error) tuples, see concurrentFetch
+        :return: generator of (URL, (Article object, list of Comment objects, URL of dedicated comments website or None) or None, error) tuples;
+                 error is ExtractionError if article page failed to parse and was saved to dead letters
+        """
+        pending = deque() # bounded queue of submitted pages
+        def result(address, html, error, future):
+            if future is None: return address, None, error
+            try: article, comments, comments_url, timings = self.parsed(future, address, address, "article", 1, html)
+            except ExtractionError as e: return address, None, e
+            for field, seconds in timings.items(): articleParser.timings[field] = articleParser.timings.get(field, 0.0) + seconds
+            articleParser.timed[0] += 1
+            return address, (article, comments, comments_url), error
+        for address, html, error in pages:
+            if self.archive and html is not None and not error: self.archive.storeArticle(address, html)
+            future = self.pool.submit(articlePage, address, html, self.backend) if html is not None and not error else None
+            pending.append((address, html, error, future))
+            if len(pending) >= self.window: yield result(*pending.popleft())
+        while pending: yield result(*pending.popleft())
+    def commentsPage(self, address, url, html, page=1):
+        """
+        Parses page of dedicated comments website in a worker process.
+        :param address: str, article URL
+        :param url: str, URL of comments page
+        :param html: str, HTML of comments page
+        :param page: int, page number
+        :return: tuple (list of Comment objects, number of pages of dedicated comments website)
+        :raises ExtractionError: if page fails to parse and dead letters are given
+        """
+        return self.parsed(self.pool.submit(commentsPage, address, html, self.backend), address, url, "comments", page, html)
+    def comments(self, address, comments_url, workers, first_page=2):
+        """
+        Gets comments from pages of dedicated comments website. Pages are fetched concurrently and parsed in worker processes.
+        First page is always fetched, further pages from first_page on.
+        :param address: str, article URL
+        :param comments_url: str, URL of dedicated comments website
+        :param workers: int, number of concurrent fetchers
+        :param first_page: int, first of further pages to fetch (>= 2)
+        :return: tuple (list of Comment objects, number of pages or None if a page could not be opened or parsed, number of fetched pages)
+        :raises ExtractionError: if first page fails to parse and dead letters are given
+        """
+        idnum = int(re.findall(r"\d+$", address)[0])
+        html = client.fetch(comments_url)
+        if self.archive: self.archive.store(idnum, comments_url, html, "comments", 1)
+        comments, pages = self.commentsPage(address, comments_url, html)
+        first_page = max(2, first_page)
+        comments_urls = [comments_url + "?page=" + str(page) for page in range(first_page, pages + 1)]
+        futures = list()
+        for page, (url, html, error) in enumerate(fetchOrdered(comments_urls, workers=workers, per_host=workers), first_page):
+            if error: # missing comments are added on next update
+                print("Failed to open comments page {}: {}. Skipping.".format(url, error))
+                pages = None
+                continue
+            if self.archive: self.archive.store(idnum, url, html, "comments", page)
+            futures.append((self.pool.submit(commentsPage, address, html, self.backend), url, page, html))
+        for future, url, page, html in futures:
+            try: comments.extend(self.parsed(future, address, url, "comments", page, html)[0])
+            except ExtractionError as e: # page is in dead letters, missing comments are added on next update
+                print("Failed to extract comments page {}: {}. Saved to dead letters.".format(url, e))
+                pages = None
+        return comments, pages, len(comments_urls) + 1
+    def archivedComments(self, address, archive):
+        """
+        Gets comments from archived pages of dedicated comments website (see module htmlArchive), parsed in worker processes.
+        :param address: str, article URL
+        :param archive: HTMLArchive object
+        :return: tuple (list of Comment objects, number of archived pages or None if no page is archived or a page could not be parsed)
+        """
+        idnum = int(re.findall(r"\d+$", address)[0])
+        futures = list()
+        while True:
+            archived = archive.lookup(idnum, "comments", len(futures) + 1)
+            if not archived: break
+            futures.append((self.pool.submit(commentsPage, address, archived[1], self.backend), archived[0], len(futures) + 1, archived[1]))
+        comments = list()
+        pages = len(futures) or None
+        for future, url, page, html in futures:
+            try: comments.extend(self.parsed(future, address, url, "comments", page, html)[0])
+            except ExtractionError as e:
+                print("Failed to extract comments page {}: {}. Saved to dead letters.".format(url, e))
+                pages = None
+        return comments, pages
+    def close(self): self.pool.shutdown()
+
+class Writer(threading.Thread):
+    """
+    Writer object for writing to database from a single thread, which owns the connection.
+    Items are passed through a bounded queue; every item is written by the write function, items are committed in batches
+    (see module batchWriter). An item that cannot be written is rolled back to its savepoint and skipped; its article page
+    is looked up in archive and saved to dead letters. Database errors (sqlite3.OperationalError, e.g. disk full or locked
+    database) stop the writer; items of the unfinished batch are then not written.
+    """
+    def __init__(self, database, write, queue_size=64, batch_size=100, interval=5.0, archive=None, dead_letters=None):
+        """
+        :param database: str, name of database
+        :param write: function, writes item to database, takes cursor and item as arguments
+        :param queue_size: int, maximum number of items waiting to be written
+        :param batch_size: int, number of items written in a transaction
+        :param interval: float, maximum number of seconds between commits
+        :param archive: HTMLArchive object, archived article pages of failed items are saved to dead letters
+        :param dead_letters: DeadLetters object for items that could not be written
+        """
+        threading.Thread.__init__(self, daemon=True)
+        self.database = database
+        self.write = write
+        self.queue = queue.Queue(queue_size)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.batch = None
+        self.tags = None
+        self.archive = archive
+        self.dead_letters = dead_letters
+        self.error = None
+        self.written = 0
+        self.failed = 0
+        self.start()
+    def run(self):
+        connection = sqlite3.connect(self.database)
+        cursor = connection.cursor()
+        self.batch = BatchWriter(connection, self.batch_size, self.interval)
+        self.tags = getDictionary(cursor) # tag IDs of database, used by write function through tagDictionary.writeRelations
+        try:
+            while True:
+                try: item = self.queue.get(timeout=self.interval)
+                except queue.Empty: # commits items written before a pause (e.g. slow fetching)
+                    if self.batch.isDue(): self.batch.commit()
+                    continue
+                if item is None: break
+                if not connection.in_transaction: connection.execute("BEGIN") # savepoint is nested, releasing it does not commit
+                cursor.execute("SAVEPOINT item")
+                try: self.write(cursor, item)
+                except sqlite3.OperationalError: raise
+                except Exception as e: # item is rolled back alone, items written before it are kept
+                    cursor.execute("ROLLBACK TO item")
+                    cursor.execute("RELEASE item")
+                    self.tags.load(cursor) # tags inserted by item were rolled back
+                    self.writeFailed(item, e)
+                    continue
+                cursor.execute("RELEASE item")
+                self.written += 1
+                self.batch.written()
+            self.batch.commit()
+        except Exception as e:
+            self.error = e
+            connection.rollback() # database cannot be written, run is stopped
+        finally: connection.close()
+    def writeFailed(self, item, error):
+        """
+        Reports item that could not be written and saves its archived article page to dead letters.
+        :param item: item that could not be written
+        :param error: exception raised by write function
+        """
+        self.failed += 1
+        article = next((part for part in item if isinstance(part, Article)), None)
+        if article is None:
+            print("Failed to write {}: {}. Skipping.".format(item, error))
+            return
+        archived = self.archive.lookup(article.getIdnum()) if self.archive else None
+        if archived and self.dead_letters:
+            self.dead_letters.record(article.getAddress(), archived[0], "article", 1, error, archived[1])
+            print("Failed to write article {}: {}. Saved to dead letters.".format(article.getAddress(), error))
+        else: print("Failed to write article {}: {}. Skipping.".format(article.getAddress(), error))
+    def put(self, item):
+        """
+        Passes item to writer, blocks while queue is full.
+        :param item: item to write
+        """
+        while True:
+            if self.error: raise self.error
+            try:
+                self.queue.put(item, timeout=1)
+                return
+            except queue.Full: pass
+    def close(self):
+        """
+        Writes remaining items and stops writer.
+        """
+        self.put(None)
+        self.join()
+        if self.error: raise self.error
+    def report(self):
+        """
+        :return: str, report of batched writes and of tag dictionary
+        """
+        if not self.batch: return "Database: nothing written."
+        return self.batch.report() + ("" if not self.failed else " {} articles could not be written.".format(self.failed)) + "\n" + self.tags.report()
@@ -6,54 +6,33 @@ Updates (overwrites) data from all fields for a given database entry in the arti
 Dependencies: modules tagRelevance, tagSimilarity
 """
 
-import urllib.request
-from bs4 import BeautifulSoup as bs
+import urllib.error
+from parserBackend import parse
 import re
 import sqlite3
 from datetime import date
 from time import time as t
 from tagSimilarity import tagSimilarity
 from tagRelevance import tagRelevance
+from httpClient import client
+from retryPolicy import isNotFound
+from responseCache import ResponseCache
+from htmlArchive import HTMLArchive
+from batchWriter import BatchWriter
+from tagDictionary import getDictionary, writeRelations
+from schema import migrate
 
 start = t()
+client.setCache(ResponseCache("responses.sqlite"))
+archive = HTMLArchive("archive") # fetched pages are kept for parsing again without fetching
 
 """
 SQL table schema.
 """
 connection = sqlite3.connect("articles.sqlite")
 cursor = connection.cursor()
-cursor.executescript("""
-    CREATE TABLE IF NOT EXISTS Articles (
-    id          INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT UNIQUE,
-    idnum       INTEGER UNIQUE,
-    address     TEXT,
-    section     TEXT,
-    author      TEXT,
-    time        TEXT,
-    hour        TEXT,
-    title       TEXT,
-    label       TEXT,
-    lead        TEXT,
-    content     TEXT,
-    important   TEXT,
-    tags        INTEGER,
-    similarity  INTEGER,
-    relevance   REAL,
-    views       INTEGER,
-    comments    INTEGER,
-    shares      INTEGER,
-    hotness     REAL,
-    refreshed   TEXT);
-
-    CREATE TABLE IF NOT EXISTS Tags (
-    id          INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT UNIQUE,
-    tag         TEXT UNIQUE);
-
-    CREATE TABLE IF NOT EXISTS Relations (
-    id_article  INTEGER,
-    id_tag      INTEGER,
-    PRIMARY KEY (id_article, id_tag))
-    """)
+migrate(connection) # see module schema
+batch = BatchWriter(connection) # commits every 100 articles or 5 seconds
 
 """
 Parsing of articles from URLs.
@@ -76,26 +55,19 @@ def removeArticle(line):
                 cursor.execute("SELECT id_tag FROM Relations WHERE id_tag = ?", (id_tag,))
                 if cursor.fetchone()[0] == 0: cursor.execute("DELETE FROM Tags WHERE id = ?", (id_tag,))
         except: pass
-        connection.commit()
+        batch.written()
         print("Article not found and removed from database: " + line.rstrip())
     except TypeError: print("Article not found but not in database: " + line.rstrip())
 
 for line in open(input("Enter file name: ")).readlines():
     if "http://" in line:
-        tries = 0
-        while True: # trying to open article 5 times before removing it from database
-            try:
-                html = urllib.request.urlopen(line.rstrip()).read().decode("UTF-8")
-                tries = 0
-                break
-            except urllib.error.HTTPError:
-                tries += 1
-                print("Failed to open article {} {} times.".format(line.rstrip(), tries))
-            if tries == 5: break
-        if tries:
-            removeArticle(line) # removes articles with 404 error
+        try: html = client.fetch(line.rstrip()) # transient errors are retried by client (see module retryPolicy)
+        except urllib.error.URLError as e:
+            if isNotFound(e): removeArticle(line) # removes articles with 404 error
+            else: print("Failed to open article {}: {}. Skipping.".format(line.rstrip(), e))
             continue
-        soup = bs(html, "html5lib") # html5lib OR lxml
+        archive.storeArticle(line.rstrip(), html)
+        soup = parse(html)
         # address (url) of article
         try:
             address = re.findall("http:\/\/siol[^\"]+", str(soup.find_all("meta")))[0]
@@ -208,18 +180,16 @@ for line in open(input("Enter file name: ")).readlines():
                                               id))
         cursor.execute("SELECT id FROM Articles WHERE idnum = ?", (id,))
         id_article = cursor.fetchone()[0]
-        for tag in tags:
-            cursor.execute("SELECT EXISTS (SELECT 1 FROM Tags WHERE tag = ?)", (tag,))
-            if cursor.fetchone()[0] == 0:
-                cursor.execute("INSERT OR IGNORE INTO Tags (tag) VALUES (?)", (tag,))
-                cursor.execute("SELECT id FROM Tags WHERE tag = ?", (tag,))
-                id_tag = cursor.fetchone()[0]
-                cursor.execute("INSERT OR REPLACE INTO Relations (id_article, id_tag) VALUES (?, ?)", (id_article, id_tag))
-            else:
-                cursor.execute("SELECT id FROM Tags WHERE tag = ?", (tag,))
-                id_tag = cursor.fetchone()[0]
-                cursor.execute("INSERT OR REPLACE INTO Relations (id_article, id_tag) VALUES (?, ?)", (id_article, id_tag))
-        connection.commit()
+        writeRelations(cursor, id_article, tags)
+        batch.written()
+batch.commit()
 connection.close()
 
+print(batch.report())
+print(getDictionary(cursor).report())
+print(archive.report())
+archive.close()
+print(client.report())
+print(client.cache.report())
+client.cache.close()
 print("Finished in %s seconds." % "{0:.3f}".format(t() - start))
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""
+Module for writing articles to a database in batched transactions. See details in method specification below.
+Instead of committing after every article, BatchWriter commits once batch_size articles are written or interval seconds
+have passed since the last commit, so a run is not dominated by syncing the database file to disk after every article.
+Database is switched to WAL journal mode with synchronous=NORMAL (durable at checkpoints, never corrupted) and a larger
+page cache. WAL does not work on network shares; use journal_mode="DELETE" for databases on network drives.
+If a run stops, at most the articles of the last unfinished batch are not written; they are written again on the next run.
+"""
+
+from time import time as t
+
+class BatchWriter(object):
+    """
+    BatchWriter object for committing writes of a connection in batches and counting written rows.
+    """
+    def __init__(self, connection, batch_size=100, interval=5.0, journal_mode="WAL", cache_size=65536):
+        """
+        :param connection: SQLite connection
+        :param batch_size: int, number of articles written in a transaction
+        :param interval: float, maximum number of seconds between commits
+        :param journal_mode: str, SQLite journal mode (WAL, DELETE, ...)
+        :param cache_size: int, size of page cache in KB
+        """
+        self.connection = connection
+        self.batch_size = batch_size
+        self.interval = interval
+        connection.execute("PRAGMA journal_mode = " + journal_mode)
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute("PRAGMA cache_size = -{}".format(cache_size))
+        self.start = t()
+        self.committed = self.start # time of last commit
+        self.changes = connection.total_changes # rows changed before writer was created
+        self.rows = 0 # rows committed
+        self.articles = 0
+        self.pending = 0 # articles written since last commit
+        self.commits = 0
+    def getInterval(self): return self.interval
+    def written(self, articles=1):
+        """
+        Counts written articles, commits if batch is full or interval passed.
+        :param articles: int, number of written articles
+        """
+        self.articles += articles
+        self.pending += articles
+        if self.pending >= self.batch_size or t() - self.committed >= self.interval: self.commit()
+    def isDue(self):
+        """
+        :return: bool, True if written articles are waiting for commit for at least interval seconds
+        """
+        return self.pending > 0 and t() - self.committed >= self.interval
+    def commit(self):
+        """
+        Commits written articles.
+        """
+        self.connection.commit()
+        self.committed = t()
+        self.rows = self.connection.total_changes - self.changes
+        if self.pending: self.commits += 1
+        self.pending = 0
+    def getRows(self): return self.rows
+    def report(self):
+        """
+        :return: str, number of committed articles and rows, number of transactions and rows committed per second (until last commit)
+        """
+        elapsed = self.committed - self.start
+        return "Database: {} articles, {} rows in {} transactions, {:.1f} rows/s.".format(self.articles - self.pending, self.rows, self.commits, self.rows / elapsed if elapsed else 0.0)
@@ -0,0 +1,58 @@
+"""
+Module for fetching pages concurrently with a bounded number of workers. See details in method specification below.
+"""
+
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from httpClient import client
+
+class HostLimiter(object):
+    """
+    HostLimiter object for limiting the number of simultaneous requests to a single host.
+    """
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self.lock = threading.Lock()
+        self.semaphores = dict()
+    def getSemaphore(self, url):
+        try: host = re.findall(r"^\w+://([^/]+)", url)[0].lower()
+        except IndexError: host = ""
+        with self.lock:
+            if host not in self.semaphores: self.semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self.semaphores[host]
+
+def fetchPage(url):
+    """
+    Fetches a single page and decodes it.
+    :param url: str, page URL
+    :return: str, HTML of page
+    """
+    return client.fetch(url)
+
+def fetchOrdered(urls, fetch=fetchPage, workers=8, per_host=4):
+    """
+    Fetches pages concurrently and yields them in the same order as given URLs, so that database writes stay deterministic.
+    At most 2 * workers pages are fetched ahead of the consumer, which keeps memory flat on large URL lists.
+    :param urls: iterable of URLs
+    :param fetch: function taking URL and returning fetched page
+    :param workers: int, number of concurrent fetchers
+    :param per_host: int, maximum number of simultaneous requests to a single host
+    :return: generator of (url, page, error) tuples; page is None and error is the raised exception if fetch failed
+    """
+    limiter = HostLimiter(per_host)
+    def limitedFetch(url):
+        with limiter.getSemaphore(url): return fetch(url)
+    window = deque()
+    urls = iter(urls)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            while len(window) < 2 * workers:
+                try: url = next(urls)
+                except StopIteration: break
+                window.append((url, executor.submit(limitedFetch, url)))
+            if not window: break
+            url, future = window.popleft()
+            try: yield url, future.result(), None
+            except Exception as e: yield url, None, e
@@ -3,25 +3,16 @@ Module for fetching new articles from previous day(s) and ouputting them as an .
 Takes start and end dates of a timeframe in YYYY-M[M]-D[D] format, start <= end, or fetches articles from a previous day.
 Adds data from new articles to the daily.xlsx file of new articles, which is created anew every time the program is run.
 Adds only address and author data! Other data can be added by uncommenting appropriate lines in the code.
+Authors are extracted while the page is streamed and the connection is closed once they are found (see module streamExtractor),
+other data requires the whole page to be fetched and parsed.
 """
 
 from datetime import datetime, date, timedelta
-import urllib.request
-from bs4 import BeautifulSoup as bs
+import urllib.error
 import openpyxl
-import re
-
-def dateGenerator(begin, end):
-    """
-    Generates dates from a given time interval.
-    :param begin: start of interval
-    :param end: end of interval, end >= start
-    :return: dates in YYY-MM-DD format from interval
-    """
-    current = begin
-    while current <= end:
-        yield current
-        current += timedelta(days=1)
+from dayIndex import dayURLs
+from streamExtractor import getAuthors, stats
+from retryPolicy import isNotFound
 
 if datetime.today().weekday() != 0: # checks if day != Monday -> fetches URLs from a previous 1 day
     begin_str = str(datetime.now().date() - timedelta(days=1))
@@ -38,14 +29,10 @@ else: # if day == Monday -> fetches URLs from a previous 3 days
 fh = open("C:\\Users\\dmihelic\\Desktop\\Tools\\daily.txt", "w", encoding="UTF-8")
 fh.write("URLs fetched on " + str(datetime.now()) + "\n")
 fh.write("Articles from " + str(begin_date) + " to " + str(end_date) + "\n")
-pattern = re.compile("href=\"(.+)\"\stitle")
-for dt in dateGenerator(begin_date, end_date):
+for dt, articles in dayURLs(begin_date, end_date):
     print(dt)
-    html = urllib.request.urlopen("http://siol.net/pregled-dneva/" + re.sub("-0", "-", str(dt)))
-    soup = bs(html, "html5lib")  # html5lib OR lxml
-    articles = re.findall(pattern, str(soup.find_all("ul", class_="timemachine__article_list")))
     for article in articles:
-        fh.write("http://siol.net" + article + "\n")
+        fh.write(article + "\n")
 fh.close()
 """
 xls file
@@ -60,12 +47,14 @@ Parsing of articles from URLs.
 """
 for line in open("C:\\Users\\dmihelic\\Desktop\\Tools\\daily.txt").readlines():
     if "http://" in line:
-        try: html = urllib.request.urlopen(line.rstrip()).read()
-        except urllib.error.HTTPError:
-            open("articles_404.txt", "a", encoding="UTF-8").write(line[:-1])
-            print("Article not found: " + line.rstrip())
+        try: authors = getAuthors(line.rstrip()) # author(s) of article
+        except urllib.error.URLError as e:
+            if isNotFound(e):
+                open("articles_404.txt", "a", encoding="UTF-8").write(line[:-1])
+                print("Article not found: " + line.rstrip())
+            else: print("Failed to open article {}: {}. Skipping.".format(line.rstrip(), e))
             continue
-        soup = bs(html, "html5lib") # html5lib OR lxml
+        # soup = parse(client.fetch(line.rstrip())) # whole page, needed for other data (import re, from httpClient import client, from parserBackend import parse)
         # address (url) of article
         address = line.rstrip()
         print(address)
@@ -74,13 +63,6 @@ for line in open("C:\\Users\\dmihelic\\Desktop\\Tools\\daily.txt").readlines():
         # # section of article
         # try: section = re.findall("\.net/(.+)/", address)[0]
         # except IndexError: section = ""
-        # author(s) of article
-        authors = list()
-        authors.extend(re.findall(">(.*?)</h3>", str(soup.find_all("h3", class_="article__author_name"))))
-        authors.extend(re.findall(">(.*?)</h3>", str(soup.find_all("h3", class_="article__authors_name"))))
-        try: authors.insert(0, re.findall("<span>(.*?)</span>", str(soup.find_all("div", class_="article__promo")))[0])
-        except IndexError: pass
-        if not authors: authors = [""]
         # # publication time of artice
         # time = re.findall("(\d+-\d+-\d+)T", str(soup("time")[0]))[0]
         # # article title
@@ -123,4 +105,5 @@ while True:
     try:
         wb.save("C:\\Users\\dmihelic\\Desktop\\Tools\\daily.xlsx")
         break
-    except PermissionError: input("Please close daily.xlsx and press any key. ")
\ No newline at end of file
+    except PermissionError: input("Please close daily.xlsx and press any key. ")
+print(stats.report())
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Module for discovering URLs of articles from day index pages (pregled-dneva) of Siol.net website. See details in method specification below.
+Day index pages are fetched concurrently. URLs of articles from days before yesterday never change and are cached permanently
+in the days.sqlite database, so only today and yesterday are fetched again on subsequent runs.
+"""
+
+import re
+import sqlite3
+from datetime import date, timedelta
+from concurrentFetch import fetchOrdered
+from httpClient import client
+from parserBackend import parse
+
+def dateGenerator(begin, end):
+    """
+    Generates dates from a given time interval.
+    :param begin: start of interval
+    :param end: end of interval, end >= start
+    :return: dates in YYY-MM-DD format from interval
+    """
+    current = begin
+    while current <= end:
+        yield current
+        current += timedelta(days=1)
+
+def dayAddress(day):
+    """
+    :param day: date
+    :return: str, URL of day index page
+    """
+    return "http://siol.net/pregled-dneva/" + re.sub("-0", "-", str(day))
+
+def fetchDay(address):
+    """
+    Fetches day index page and parses URLs of articles from it.
+    :param address: str, URL of day index page
+    :return: list, URLs of articles
+    """
+    soup = parse(client.fetch(address))
+    return ["http://siol.net" + article for article in re.findall("href=\"(.+)\"\\stitle", str(soup.find_all("ul", class_="timemachine__article_list")))]
+
+def dayURLs(begin, end, workers=8, cache="days.sqlite"):
+    """
+    Discovers URLs of articles from a given time interval.
+    :param begin: start of interval
+    :param end: end of interval, end >= start
+    :param workers: int, number of concurrent fetchers
+    :param cache: str, name of cache database
+    :return: generator of (date, list of URLs of articles) tuples in date order
+    """
+    connection = sqlite3.connect(cache)
+    connection.execute("CREATE TABLE IF NOT EXISTS Days (day TEXT NOT NULL PRIMARY KEY, urls TEXT)")
+    cached = dict(connection.execute("SELECT day, urls FROM Days WHERE day BETWEEN ? AND ?", (str(begin), str(end))).fetchall())
+    days = list(dateGenerator(begin, end))
+    fetched = fetchOrdered([dayAddress(day) for day in days if str(day) not in cached], fetchDay, workers)
+    final = date.today() - timedelta(days=1) # days before this date are cached permanently
+    try:
+        for day in days:
+            if str(day) in cached:
+                yield day, cached[str(day)].split("\n")
+                continue
+            address, urls, error = next(fetched)
+            if error: raise error
+            if day < final and urls:
+                connection.execute("INSERT OR REPLACE INTO Days (day, urls) VALUES (?, ?)", (str(day), "\n".join(urls)))
+                connection.commit()
+            yield day, urls
+    finally:
+        fetched.close()
+        connection.close()
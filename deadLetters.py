@@ -0,0 +1,94 @@
+"""
+Module for storing pages from which data could not be extracted (dead letters). See details in method specification below.
+A page that fails to parse (e.g. live blogs, galleries, PR pages with unusual layout) is saved with its URL, the exception and
+its raw HTML to the deadletters.sqlite database and the run continues with the next page.
+Dead letters are re-processed in bulk with reprocessDeadLetters.py once the parser is fixed.
+"""
+
+import sqlite3
+import threading
+import traceback
+from datetime import datetime
+
+class DeadLetters(object):
+    """
+    DeadLetters object for saving and reading dead letters. Thread-safe.
+    """
+    def __init__(self, path="deadletters.sqlite", database=None):
+        """
+        :param path: str, name of dead letters database
+        :param database: str, name of articles database the recorded pages were meant for
+        """
+        self.database = database
+        self.lock = threading.Lock()
+        self.recorded = 0
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS DeadLetters (
+            id          INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT UNIQUE,
+            address     TEXT,
+            url         TEXT,
+            kind        TEXT,
+            page        INTEGER,
+            database    TEXT,
+            error       TEXT,
+            traceback   TEXT,
+            html        TEXT,
+            failed      TEXT,
+            attempts    INTEGER,
+            UNIQUE (address, kind, page, database))
+            """)
+    def setDatabase(self, database): self.database = database
+    def record(self, address, url, kind, page, error, html):
+        """
+        Saves page that could not be parsed; a page saved before is overwritten and its number of attempts increased.
+        :param address: str, article URL
+        :param url: str, page URL
+        :param kind: str, article or comments
+        :param page: int, page number (comments pages)
+        :param error: exception raised by parser
+        :param html: str, HTML of page
+        """
+        with self.lock:
+            self.connection.execute("""INSERT INTO DeadLetters (address, url, kind, page, database, error, traceback, html, failed, attempts)
+                                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+                                       ON CONFLICT (address, kind, page, database) DO UPDATE SET url = excluded.url,
+                                                                                                 error = excluded.error,
+                                                                                                 traceback = excluded.traceback,
+                                                                                                 html = excluded.html,
+                                                                                                 failed = excluded.failed,
+                                                                                                 attempts = attempts + 1""",
+                                    (address, url, kind, page, self.database, "{}: {}".format(type(error).__name__, error),
+                                     "".join(traceback.format_exception(type(error), error, error.__traceback__)), html, str(datetime.now())))
+            self.connection.commit()
+            self.recorded += 1
+    def databases(self):
+        """
+        :return: list, names of articles databases with dead letters
+        """
+        with self.lock: return [row[0] for row in self.connection.execute("SELECT DISTINCT database FROM DeadLetters")]
+    def entries(self, database, kind):
+        """
+        Reads dead letters.
+        :param database: str, name of articles database
+        :param kind: str, article or comments
+        :return: list, (ID, article URL, page URL, page number, HTML) tuples
+        """
+        with self.lock: return self.connection.execute("SELECT id, address, url, page, html FROM DeadLetters WHERE database IS ? AND kind = ? ORDER BY id", (database, kind)).fetchall()
+    def remove(self, ids):
+        """
+        Removes re-processed dead letters.
+        :param ids: list, IDs of dead letters
+        """
+        with self.lock:
+            self.connection.executemany("DELETE FROM DeadLetters WHERE id = ?", [(id,) for id in ids])
+            self.connection.commit()
+    def getCount(self):
+        with self.lock: return self.connection.execute("SELECT COUNT(*) FROM DeadLetters").fetchone()[0]
+    def report(self):
+        """
+        :return: str, number of pages saved in this run and number of dead letters waiting for re-processing
+        """
+        return "Dead letters: {} pages saved in this run, {} waiting for re-processing (reprocessDeadLetters.py).".format(self.recorded, self.getCount())
+    def close(self):
+        with self.lock: self.connection.close()
@@ -4,21 +4,15 @@ Takes start and end dates of a timeframe in YYYY-M[M]-D[D] format, start <= end.
 Fetches URls of articles from a given timeframe and saves them in the articles.txt file.
 """
 
-from datetime import date, datetime, timedelta
-import urllib.request
-from bs4 import BeautifulSoup as bs
+from datetime import date, datetime
 import re
 from time import time as t
+from httpClient import client
+from dayIndex import dayURLs
 
 class DateError(Exception):
     pass
 
-def dateGenerator(begin, end):
-    current = begin
-    while current <= end:
-        yield current
-        current += timedelta(days=1)
-
 """
 Fetching new URLs
 """
@@ -48,15 +42,12 @@ start = t()
 fh = open("articles.txt", "a", encoding="UTF-8")
 fh.write("\nURLs fetched on " + str(datetime.now()) + "\n")
 fh.write("Articles from " + str(begin_date) + " to " + str(end_date) + "\n")
-pattern = re.compile("href=\"(.+)\"\stitle")
-for dt in dateGenerator(begin_date, end_date):
+for dt, articles in dayURLs(begin_date, end_date):
     print(dt)
-    html = urllib.request.urlopen("http://siol.net/pregled-dneva/" + re.sub("-0", "-", str(dt)))
-    soup = bs(html, "html5lib")  # html5lib OR lxml
-    articles = re.findall(pattern, str(soup.find_all("ul", class_="timemachine__article_list")))
     for article in articles:
-        fh.write("http://siol.net" + article + "\n")
+        fh.write(article + "\n")
 fh.close()
 
+print(client.report())
 print("Finished in %s seconds." % "{0:.3f}".format(t() - start))
 print("URLs appended to articles.txt.")
\ No newline at end of file
@@ -1,16 +1,83 @@
 """
 Module for finding articles that do not exist/cannot be reached (HTTPError).
 Takes URLs of articles to add in a form of a .txt file as an input.
+Checks articles concurrently (number of in-flight requests adapts to server load) with HEAD requests (GET if HEAD is not allowed) and follows redirects.
+Articles that return an HTTP error or are redirected to a section website (final URL without article ID) are treated as not found.
 Finds articles that do not exist/cannot be reached and saves them in the articles_404.txt file.
-Due to a possible large number of URLs to check and long running time of the program, a print statement prompts whenever 100 articles have been checked.
+Saves status code, final URL, latency and result for every checked article in the find404_report.csv file.
+Progress is saved in the find404_state.txt file after every 100 checked articles, so that an interrupted check can be resumed;
+together with progress, sizes of both output files are saved, and on resume rows written after the last save are removed.
 """
 
-import urllib.request
+import csv
+import os
+import re
+import urllib.error
+from time import time as t
+from concurrentFetch import fetchOrdered
+from httpClient import client
+from adaptiveConcurrency import AdaptiveConcurrency
 
-lines = open(input("Enter file name: ")).readlines()
-for i in range(len(lines)):
-    if i % 100 == 0: print(i)
-    try: urllib.request.urlopen(lines[i].rstrip())
-    except urllib.error.HTTPError:
-        open("articles_404.txt", "a", encoding="UTF-8").write(lines[i])
-        print("Article not found: " + lines[i].rstrip())
\ No newline at end of file
+def checkArticle(address):
+    """
+    Checks if article exists.
+    :param address: str, article URL
+    :return: tuple (status code, final URL, latency in ms, result), result is one of ok, not found, redirected, unreachable
+    """
+    start = t()
+    try:
+        try: response = client.head(address)
+        except urllib.error.HTTPError as e:
+            if e.code not in (405, 501): raise
+            response = client.get(address) # HEAD not allowed
+        status = response.getStatus()
+        final = response.getUrl()
+        if re.search(r"\d+$", final): result = "ok"
+        else: result = "redirected" # redirected to section website
+    except urllib.error.HTTPError as e:
+        status, final, result = e.code, address, "not found"
+    except urllib.error.URLError:
+        status, final, result = 0, address, "unreachable"
+    return status, final, round((t() - start) * 1000), result
+
+file_name = input("Enter file name: ")
+workers = input("Enter maximum number of concurrent checkers (default 32): ")
+workers = int(workers) if workers.isdigit() and int(workers) > 0 else 32
+limiter = AdaptiveConcurrency(maximum=workers) # adjusts number of in-flight requests to server load
+client.setLimiter(limiter)
+lines = [line.rstrip() for line in open(file_name).readlines() if "http://" in line or "https://" in line]
+done = 0
+if os.path.exists("find404_state.txt"):
+    state = open("find404_state.txt", encoding="UTF-8").read().split("\n")
+    if state[0] == file_name and input("Resume check of {} from article {}? Y/N ".format(file_name, state[1])) in ["Y", "y"]:
+        done = int(state[1])
+        if len(state) > 3: # outputs are cut back to the saved progress, rows of articles checked after it are written again
+            if os.path.exists("find404_report.csv"): os.truncate("find404_report.csv", int(state[2]))
+            if os.path.exists("articles_404.txt"): os.truncate("articles_404.txt", int(state[3]))
+start = t()
+resumed = done and os.path.exists("find404_report.csv")
+report = open("find404_report.csv", "a" if resumed else "w", encoding="UTF-8", newline="")
+writer = csv.writer(report)
+if not resumed: writer.writerow(["address", "status", "final_address", "latency_ms", "result"])
+not_found = open("articles_404.txt", "a", encoding="UTF-8")
+found = 0
+for i, (address, check, error) in enumerate(fetchOrdered(lines[done:], checkArticle, workers, workers), done + 1):
+    if error: raise error
+    status, final, latency, result = check
+    writer.writerow([address, status, final, latency, result])
+    if result in ("not found", "redirected"):
+        not_found.write(address + "\n")
+        print("Article not found ({}): {}".format(status if result == "not found" else "redirected to " + final, address))
+        found += 1
+    if i % 100 == 0:
+        report.flush()
+        not_found.flush()
+        open("find404_state.txt", "w", encoding="UTF-8").write("\n".join([file_name, str(i), str(os.path.getsize("find404_report.csv")), str(os.path.getsize("articles_404.txt"))]))
+        print("{} checked, {:.1f} articles/s, {}".format(i, (i - done) / (t() - start), limiter.report()))
+report.close()
+not_found.close()
+if os.path.exists("find404_state.txt"): os.remove("find404_state.txt")
+
+print("{} articles checked, {} not found.".format(len(lines) - done, found))
+print(client.report())
+print("Finished in %s seconds." % "{0:.3f}".format(t() - start))
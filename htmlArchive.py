@@ -0,0 +1,260 @@
+"""
+Module for archiving fetched HTML pages, so that articles can be parsed again without fetching them. See details in method specification below.
+Pages are appended to a pack file (archive.pack), every page compressed separately with zlib.
+Offsets of pages are appended to an index file (archive.idx) of fixed-size entries (article ID, fetch time, kind, page number,
+offset, compressed size, raw size), which is memory-mapped. Pages are looked up by article ID, kind (article or comments)
+and page number in O(1) in a key file (archive.keys), an open-addressed hash table (linear probing) of fixed-size slots
+(article ID, kind, page number, position of entry in index + 1) hashed by article ID, kind and page number, which is
+memory-mapped; the latest page or the latest page fetched before a given time is returned. The key file records how many
+index entries it holds; entries appended since (e.g. by scripts that only append pages) are added to it on first lookup,
+and it is doubled when it is 2/3 full.
+Opening an archive does not read the index, so scripts that only append pages are not slowed down by the size of the archive.
+Writes are append-only; entries of a write interrupted by a crash are dropped when archive is opened.
+"""
+
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from array import array
+from time import time as t
+
+ENTRY = struct.Struct("<qdBHQII") # article ID, fetch time, kind, page number, offset in pack file, compressed size, raw size
+HEADER = struct.Struct("<8sQQ") # magic, number of slots, number of index entries in hash table
+SLOT = struct.Struct("<QBHQ") # article ID, kind, page number, position of entry in index + 1 (0 marks empty slot)
+MAGIC = b"ARCHKEYS"
+SLOTS = 1024 # minimum number of slots
+LOAD = 1.5 # slots per entry at maximum load
+KINDS = ("article", "comments")
+
+class HTMLArchive(object):
+    """
+    HTMLArchive object for storing and looking up compressed HTML pages. Thread-safe.
+    """
+    def __init__(self, path="archive", level=6):
+        """
+        :param path: str, path of archive files without extension (.pack and .idx are added)
+        :param level: int, zlib compression level
+        """
+        self.path = path
+        self.level = level
+        self.lock = threading.Lock()
+        self.pack = open(path + ".pack", "ab+")
+        self.index = open(path + ".idx", "ab+")
+        pack_size = self.pack.seek(0, os.SEEK_END)
+        self.entries = self.index.seek(0, os.SEEK_END) // ENTRY.size
+        self.map = None
+        self.mapped = 0 # number of entries in memory-mapped part of index
+        self.remap()
+        while self.entries and sum(self.entry(self.entries - 1)[4:6]) > pack_size: self.entries -= 1 # page of entry not fully written
+        if self.index.tell() != self.entries * ENTRY.size:
+            if self.map: self.map.close()
+            self.map = None
+            self.index.truncate(self.entries * ENTRY.size)
+            if os.path.exists(path + ".keys"): os.remove(path + ".keys") # may hold positions of dropped entries
+            self.remap()
+        self.table = None # key file, opened on first lookup
+        self.keys = None # memory-mapped key file
+        self.slots = 0
+        self.indexed = 0 # number of index entries in key file
+        self.pages = 0 # pages stored since archive was opened
+        self.raw = 0
+        self.stored = 0
+    def remap(self):
+        """
+        Memory-maps index file, after it grew.
+        """
+        if self.map: self.map.close()
+        self.index.flush()
+        self.map = mmap.mmap(self.index.fileno(), 0, access=mmap.ACCESS_READ) if self.index.seek(0, os.SEEK_END) else None
+        self.mapped = len(self.map) // ENTRY.size if self.map else 0
+    def openTable(self):
+        """
+        Memory-maps hash table file and adds slots of entries appended since it was last updated, on first lookup
+        (called with lock held). Hash table that does not match index (e.g. index of an interrupted write was truncated) is built anew.
+        """
+        header = (b"", 0, 0)
+        if os.path.exists(self.path + ".keys") and os.path.getsize(self.path + ".keys") >= HEADER.size:
+            with open(self.path + ".keys", "rb") as table: header = HEADER.unpack(table.read(HEADER.size))
+        if header[0] == MAGIC and header[2] <= self.entries and os.path.getsize(self.path + ".keys") == HEADER.size + header[1] * SLOT.size:
+            self.mapTable()
+            self.slots, self.indexed = header[1:]
+        else: self.resize(self.fit(self.entries + 1), False)
+        if (self.entries + 1) * LOAD > self.slots: self.resize(self.fit(self.entries + 1), True) # sized once for all missing entries
+        if self.mapped < self.entries: self.remap()
+        for position in range(self.indexed, self.entries): self.insert(position, self.entry(position))
+    def mapTable(self):
+        if self.keys: self.closeTable()
+        self.table = open(self.path + ".keys", "r+b")
+        self.keys = mmap.mmap(self.table.fileno(), 0)
+    def closeTable(self):
+        if self.keys: self.keys.close()
+        if self.table: self.table.close()
+        self.keys = None
+        self.table = None
+    def fit(self, entries):
+        """
+        :param entries: int, number of entries
+        :return: int, number of slots (power of 2) for entries at maximum load
+        """
+        slots = SLOTS
+        while entries * LOAD > slots: slots *= 2
+        return slots
+    def resize(self, slots, keep):
+        """
+        Writes hash table file anew with given number of slots.
+        :param slots: int, number of slots (power of 2)
+        :param keep: bool, True if keys of current table are copied, False if table is built anew (by caller)
+        """
+        with open(self.path + ".keys.tmp", "wb") as table:
+            table.write(HEADER.pack(MAGIC, slots, 0))
+            table.truncate(HEADER.size + slots * SLOT.size) # empty slots are zero
+        old, old_slots, indexed = (self.keys, self.slots, self.indexed) if keep else (None, 0, 0)
+        with open(self.path + ".keys.tmp", "r+b") as table:
+            self.keys = mmap.mmap(table.fileno(), 0)
+            self.slots = slots
+            for i in range(old_slots):
+                idnum, kind, page, position = SLOT.unpack_from(old, HEADER.size + i * SLOT.size)
+                if position: self.place(idnum, kind, page, position)
+            HEADER.pack_into(self.keys, 0, MAGIC, slots, indexed)
+            self.keys.close()
+        self.keys = old
+        self.closeTable()
+        os.replace(self.path + ".keys.tmp", self.path + ".keys")
+        self.mapTable()
+        self.indexed = indexed
+    def slot(self, idnum, kind, page):
+        """
+        :param idnum: int, article ID
+        :param kind: int, index of kind in KINDS
+        :param page: int, page number
+        :return: int, first slot of page in hash table
+        """
+        h = (idnum * 0x9E3779B97F4A7C15 ^ ((kind << 16) | page) * 0xC2B2AE3D27D4EB4F) & 0xFFFFFFFFFFFFFFFF
+        return (h ^ (h >> 31)) & (self.slots - 1)
+    def place(self, idnum, kind, page, position):
+        """
+        Writes key to first empty slot from its slot on (linear probing).
+        :param position: int, position of entry in index + 1 (0 marks empty slot)
+        """
+        i = self.slot(idnum, kind, page)
+        while SLOT.unpack_from(self.keys, HEADER.size + i * SLOT.size)[3]: i = (i + 1) & (self.slots - 1)
+        SLOT.pack_into(self.keys, HEADER.size + i * SLOT.size, idnum, kind, page, position)
+    def insert(self, position, entry):
+        """
+        Adds entry to hash table, table is doubled when it is full (called with lock held).
+        :param position: int, position of entry in index
+        :param entry: tuple, index entry
+        """
+        if (self.indexed + 1) * LOAD > self.slots: self.resize(self.slots * 2, True)
+        self.place(entry[0], entry[2], entry[3], position + 1)
+        self.indexed = position + 1
+        HEADER.pack_into(self.keys, 0, MAGIC, self.slots, self.indexed)
+    def positions(self, idnum, kind, page):
+        """
+        :param idnum: int, article ID
+        :param kind: int, index of kind in KINDS
+        :param page: int, page number
+        :return: list, positions of entries of page in index, in fetch order (called with lock held)
+        """
+        if self.keys is None: self.openTable()
+        positions = set()
+        i = self.slot(idnum, kind, page)
+        while True:
+            key = SLOT.unpack_from(self.keys, HEADER.size + i * SLOT.size)
+            if not key[3]: break
+            if key[:3] == (idnum, kind, page): positions.add(key[3] - 1)
+            i = (i + 1) & (self.slots - 1)
+        return sorted(positions)
+    def entry(self, position):
+        """
+        :param position: int, position of entry in index
+        :return: tuple (article ID, fetch time, kind, page number, offset, compressed size, raw size)
+        """
+        if position >= self.mapped: self.remap()
+        return ENTRY.unpack_from(self.map, position * ENTRY.size)
+    def store(self, idnum, url, html, kind="article", page=1, fetched=None):
+        """
+        Appends page to archive.
+        :param idnum: int, article ID
+        :param url: str, page URL
+        :param html: str, HTML of page
+        :param kind: str, article or comments
+        :param page: int, page number (comments pages)
+        :param fetched: float, fetch time (Unix time), current time if None
+        """
+        raw = (url + "\n" + html).encode("UTF-8")
+        data = zlib.compress(raw, self.level)
+        with self.lock:
+            offset = self.pack.seek(0, os.SEEK_END)
+            self.pack.write(data)
+            self.pack.flush()
+            self.index.write(ENTRY.pack(idnum, fetched or t(), KINDS.index(kind), page, offset, len(data), len(raw)))
+            self.index.flush()
+            if self.keys is not None: self.insert(self.entries, (idnum, None, KINDS.index(kind), page))
+            self.entries += 1
+            self.pages += 1
+            self.raw += len(raw)
+            self.stored += len(data)
+    def storeArticle(self, url, html):
+        """
+        Appends article page to archive, article ID is taken from URL.
+        :param url: str, article URL
+        :param html: str, HTML of article page
+        """
+        self.store(int(re.findall(r"\d+$", url)[0]), url, html)
+    def read(self, entry):
+        """
+        :param entry: tuple, index entry
+        :return: tuple (URL, HTML, fetch time)
+        """
+        self.pack.seek(entry[4])
+        url, html = zlib.decompress(self.pack.read(entry[5])).decode("UTF-8").split("\n", 1)
+        return url, html, entry[1]
+    def lookup(self, idnum, kind="article", page=1, before=None):
+        """
+        Looks up page in archive.
+        :param idnum: int, article ID
+        :param kind: str, article or comments
+        :param page: int, page number (comments pages)
+        :param before: float, latest fetch time (Unix time) of page, None for latest page
+        :return: tuple (URL, HTML, fetch time) or None if page is not in archive
+        """
+        with self.lock:
+            for position in reversed(self.positions(idnum, KINDS.index(kind), page)):
+                entry = self.entry(position)
+                if before is None or entry[1] <= before: return self.read(entry)
+        return None
+    def articles(self, before=None):
+        """
+        Generates latest archived article pages.
+        :param before: float, latest fetch time (Unix time) of pages, None for latest pages
+        :return: generator of (article ID, URL, HTML, fetch time) tuples
+        """
+        with self.lock: # article IDs are taken at once, as key file is reordered when it is doubled
+            if self.keys is None: self.openTable()
+            idnums = array("q")
+            for i in range(self.slots):
+                idnum, kind, page, position = SLOT.unpack_from(self.keys, HEADER.size + i * SLOT.size)
+                if position and kind == 0 and page == 1 and self.positions(idnum, 0, 1)[0] == position - 1: idnums.append(idnum) # first entry of article
+        for idnum in idnums:
+            archived = self.lookup(idnum, before=before)
+            if archived: yield (idnum,) + archived
+    def getCount(self): return self.entries
+    def report(self):
+        """
+        :return: str, number of archived pages and size of pack file, number of pages stored since archive was opened, their raw and stored size and compression ratio
+        """
+        with self.lock:
+            ratio = self.raw / self.stored if self.stored else 0.0
+            return "Archive: {} pages, {:.1f} MB; stored {} pages, {:.1f} MB raw, {:.1f} MB stored, compression {:.1f}x.".format(
+                self.entries, self.pack.seek(0, os.SEEK_END) / 1048576, self.pages, self.raw / 1048576, self.stored / 1048576, ratio)
+    def close(self):
+        with self.lock:
+            if self.map: self.map.close()
+            self.map = None
+            self.closeTable()
+            self.pack.close()
+            self.index.close()
@@ -0,0 +1,291 @@
+"""
+Module for fetching pages over pooled keep-alive HTTP connections. See details in method specification below.
+Responses are requested with gzip/deflate compression and decompressed transparently.
+Failed requests raise urllib.error.HTTPError (status >= 400) or urllib.error.URLError (connection errors, timeouts), same as urllib.request.urlopen.
+If a ResponseCache is set, GET requests are served from and stored to the cache (see module responseCache).
+If a RetryPolicy is set, requests failing with a transient error are retried (see module retryPolicy).
+If a limiter is set, the number of in-flight requests is limited by it (see module adaptiveConcurrency).
+stream() reads a page in chunks, so that reading can be stopped (and the connection closed) once the needed part of the page is read.
+"""
+
+import codecs
+import gzip
+import http.client
+import io
+import threading
+import urllib.error
+import urllib.parse
+import zlib
+from time import time as t
+from retryPolicy import CircuitBreaker, RetryPolicy
+
+class Response(object):
+    """
+    Response object for storing data of a fetched page.
+    """
+    def __init__(self, url, status, headers, body, elapsed):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+    def getUrl(self): return self.url
+    def getStatus(self): return self.status
+    def getHeader(self, name, default=None): return self.headers.get(name, default)
+    def getBody(self): return self.body
+    def getElapsed(self): return self.elapsed
+    def getText(self):
+        charset = self.headers.get_content_charset() if self.headers else None
+        return self.body.decode(charset or "UTF-8")
+
+class HTTPClient(object):
+    """
+    HTTPClient object for fetching pages over pooled keep-alive connections.
+    Thread-safe; each connection is used by a single thread at a time.
+    """
+    def __init__(self, timeout=30, pool_size=8, max_redirects=5, user_agent="ArticleTools", cache=None, retry=None, limiter=None):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.max_redirects = max_redirects
+        self.user_agent = user_agent
+        self.cache = cache
+        self.retry = retry
+        self.limiter = limiter
+        self.lock = threading.Lock()
+        self.pools = dict() # (scheme, host) -> list of idle connections
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+        self.received = 0 # bytes received over network
+        self.decoded = 0 # bytes after decompression
+        self.latency = 0.0
+        self.max_latency = 0.0
+        self.saved = 0 # bytes not downloaded because streams were closed early (known only if Content-Length was sent)
+    def getConnection(self, scheme, host, fresh=False):
+        """
+        :param fresh: bool, True if a new connection is opened instead of an idle one from pool
+        :return: tuple (connection, True if connection was taken from pool)
+        """
+        with self.lock:
+            pool = self.pools.get((scheme, host))
+            if pool and not fresh: return pool.pop(), True
+            self.connections += 1
+        if scheme == "https": return http.client.HTTPSConnection(host, timeout=self.timeout), False
+        return http.client.HTTPConnection(host, timeout=self.timeout), False
+    def releaseConnection(self, scheme, host, connection):
+        with self.lock:
+            pool = self.pools.setdefault((scheme, host), list())
+            if len(pool) < self.pool_size:
+                pool.append(connection)
+                return
+        connection.close()
+    def connect(self, method, url, headers):
+        """
+        Sends a single request without following redirects and without reading response body.
+        :return: tuple (connection, http.client response)
+        """
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or "/"
+        if parts.query: path += "?" + parts.query
+        headers = dict(headers)
+        headers.setdefault("User-Agent", self.user_agent)
+        headers.setdefault("Accept-Encoding", "gzip, deflate")
+        retried = False
+        while True:
+            connection, reused = self.getConnection(parts.scheme, parts.netloc, retried)
+            try:
+                connection.request(method, path, headers=headers)
+                return connection, connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                connection.close()
+                if reused and not retried: # stale keep-alive connection, retry once on a fresh one
+                    retried = True
+                    continue
+                raise urllib.error.URLError(e)
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                raise urllib.error.URLError(e)
+    def finish(self, url, connection, response):
+        """
+        Returns connection to pool after response body was read.
+        """
+        if response.will_close: connection.close()
+        else:
+            parts = urllib.parse.urlsplit(url)
+            self.releaseConnection(parts.scheme, parts.netloc, connection)
+    def send(self, method, url, headers):
+        """
+        Sends a single request without following redirects.
+        :return: tuple (status, headers, body as received, reason)
+        """
+        connection, response = self.connect(method, url, headers)
+        try: body = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            connection.close()
+            raise urllib.error.URLError(e)
+        self.finish(url, connection, response)
+        return response.status, response.msg, body, response.reason
+    def setCache(self, cache): self.cache = cache
+    def setLimiter(self, limiter):
+        self.limiter = limiter
+        self.pool_size = max(self.pool_size, limiter.maximum) # keeps a connection for every in-flight request
+    def request(self, url, method="GET", headers=None):
+        """
+        Fetches URL, follows redirects and decompresses response body.
+        GET requests are served from cache if page is cached and fresh or not modified (304) since it was cached.
+        :param url: str, page URL
+        :param method: str, HTTP method (GET or HEAD)
+        :param headers: dict, additional request headers
+        :return: Response object
+        """
+        if self.cache is None or method != "GET": return self.attempt(url, method, headers)
+        cached = self.cache.lookup(url)
+        if cached and self.cache.isFresh(cached):
+            self.cache.hit(cached)
+            return Response(url, 200, cached.getHeaders(), cached.getBody(), 0.0)
+        response = self.attempt(url, method, self.cache.conditionalHeaders(cached, headers))
+        if cached and response.getStatus() == 304:
+            self.cache.hit(cached, True)
+            return Response(url, 200, cached.getHeaders(), cached.getBody(), response.getElapsed())
+        if response.getStatus() == 200: self.cache.store(url, response.headers, response.getBody())
+        return response
+    def attempt(self, url, method="GET", headers=None):
+        if self.retry is None: return self.download(url, method, headers)
+        return self.retry.call(self.download, url, method, headers)
+    def download(self, url, method="GET", headers=None):
+        """
+        Fetches URL over network, follows redirects and decompresses response body.
+        :param url: str, page URL
+        :param method: str, HTTP method (GET or HEAD)
+        :param headers: dict, additional request headers
+        :return: Response object
+        """
+        if self.limiter: self.limiter.acquire()
+        start = t()
+        status = 0
+        try:
+            for redirect in range(self.max_redirects + 1):
+                status, response_headers, body, reason = self.send(method, url, headers or dict())
+                if status in (301, 302, 303, 307, 308) and response_headers.get("Location"):
+                    url = urllib.parse.urljoin(url, response_headers.get("Location"))
+                    continue
+                break
+            received = len(body)
+            encoding = (response_headers.get("Content-Encoding") or "").lower()
+            if not body or method == "HEAD": encoding = "" # nothing to decompress (e.g. deflate headers of HEAD responses)
+            if encoding == "gzip": body = gzip.decompress(body)
+            elif encoding == "deflate":
+                try: body = zlib.decompress(body)
+                except zlib.error: body = zlib.decompress(body, -zlib.MAX_WBITS)
+        except urllib.error.URLError:
+            self.count(t() - start, 0, 0, True)
+            raise
+        finally:
+            if self.limiter: self.limiter.release(t() - start, status)
+        elapsed = t() - start
+        self.count(elapsed, received, len(body), status >= 400)
+        if status >= 400: raise urllib.error.HTTPError(url, status, reason, response_headers, io.BytesIO(body))
+        return Response(url, status, response_headers, body, elapsed)
+    def open(self, url, headers=None):
+        """
+        Sends GET request and follows redirects, leaving body of final response unread.
+        :param url: str, page URL
+        :param headers: dict, additional request headers
+        :return: tuple (final URL, connection, http.client response)
+        """
+        for redirect in range(self.max_redirects + 1):
+            connection, response = self.connect("GET", url, headers or dict())
+            if response.status in (301, 302, 303, 307, 308) and response.getheader("Location") and redirect < self.max_redirects:
+                response.read()
+                self.finish(url, connection, response)
+                url = urllib.parse.urljoin(url, response.getheader("Location"))
+                continue
+            if response.status >= 400:
+                try: body = response.read()
+                except (OSError, http.client.HTTPException): body = b""
+                connection.close()
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.msg, io.BytesIO(body))
+            return url, connection, response
+    def stream(self, url, chunk_size=16384, headers=None):
+        """
+        Fetches URL in chunks. Closing the generator before the page is read to the end closes the connection,
+        so that the rest of the page is not downloaded. Streamed pages are not cached; only opening of the page is retried.
+        :param url: str, page URL
+        :param chunk_size: int, number of bytes read at a time
+        :param headers: dict, additional request headers
+        :return: generator of decoded chunks of page (str)
+        """
+        if self.limiter: self.limiter.acquire()
+        start = t()
+        status = 0
+        received = 0
+        decoded = 0
+        length = None
+        complete = False
+        connection = None
+        try:
+            if self.retry: url, connection, response = self.retry.call(self.open, url, headers)
+            else: url, connection, response = self.open(url, headers)
+            status = response.status
+            length = response.getheader("Content-Length")
+            encoding = (response.getheader("Content-Encoding") or "").lower()
+            if encoding == "gzip": decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            elif encoding == "deflate": decompressor = zlib.decompressobj()
+            else: decompressor = None
+            decoder = codecs.getincrementaldecoder(response.msg.get_content_charset() or "UTF-8")(errors="replace")
+            while True:
+                try: data = response.read(chunk_size)
+                except (OSError, http.client.HTTPException) as e: raise urllib.error.URLError(e)
+                if not data: break
+                received += len(data)
+                if decompressor: data = decompressor.decompress(data)
+                decoded += len(data)
+                yield decoder.decode(data)
+            complete = True
+            yield decoder.decode(decompressor.flush() if decompressor else b"", True)
+        except urllib.error.HTTPError as e:
+            status = e.code
+            raise
+        finally:
+            if connection:
+                if complete: self.finish(url, connection, response)
+                else: connection.close()
+            with self.lock:
+                if not complete and length and length.isdigit(): self.saved += max(0, int(length) - received)
+            self.count(t() - start, received, decoded, status == 0 or status >= 400)
+            if self.limiter: self.limiter.release(t() - start, status)
+    def count(self, elapsed, received, decoded, error):
+        with self.lock:
+            self.requests += 1
+            self.errors += error
+            self.received += received
+            self.decoded += decoded
+            self.latency += elapsed
+            self.max_latency = max(self.max_latency, elapsed)
+    def get(self, url, headers=None): return self.request(url, "GET", headers)
+    def head(self, url, headers=None): return self.request(url, "HEAD", headers)
+    def fetch(self, url):
+        """
+        Fetches URL and returns decoded page.
+        :param url: str, page URL
+        :return: str, HTML of page
+        """
+        return self.get(url).getText()
+    def report(self):
+        """
+        Summarizes requests made by client.
+        :return: str, report of request counts, connection reuse, latencies and transferred bytes
+        """
+        with self.lock:
+            average = self.latency / self.requests * 1000 if self.requests else 0.0
+            return "HTTP: {} requests ({} failed) over {} connections, latency avg {:.0f} ms, max {:.0f} ms, {:.1f} KB received ({:.1f} KB decompressed).".format(
+                self.requests, self.errors, self.connections, average, self.max_latency * 1000, self.received / 1024, self.decoded / 1024) + (
+                " {:.1f} KB not downloaded (streams closed early).".format(self.saved / 1024) if self.saved else "") + (
+                "\n" + self.retry.report() if self.retry else "")
+    def close(self):
+        with self.lock:
+            for pool in self.pools.values():
+                for connection in pool: connection.close()
+            self.pools = dict()
+
+client = HTTPClient(retry=RetryPolicy(breaker=CircuitBreaker())) # shared client used by all fetching scripts
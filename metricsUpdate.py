@@ -0,0 +1,44 @@
+"""
+Module for refreshing metrics (views, shares, number of comments, hotness) of articles in a database.
+Takes URLs of articles to refresh in a form of a .txt file as an input.
+Metrics are extracted while pages are streamed and connections are closed once they are found (see module streamExtractor),
+so that pages are not downloaded and parsed whole. Other data of articles is not modified.
+!!! Articles must exist in database in order to be refreshed. !!!
+"""
+
+import re
+import sqlite3
+from datetime import date
+from time import time as t
+from concurrentFetch import fetchOrdered
+from httpClient import client
+from retryPolicy import isNotFound
+from streamExtractor import getMetrics, stats
+from schema import getMetricsUpdate, migrate
+
+start = t()
+connection = sqlite3.connect("articles.sqlite")
+cursor = connection.cursor()
+migrate(connection) # see module schema
+query = getMetricsUpdate(connection) # only metrics are written (ArticleMetrics table)
+lines = [line.rstrip() for line in open(input("Enter file name: ")).readlines() if "http://" in line or "https://" in line]
+workers = input("Enter number of concurrent fetchers (default 8): ")
+workers = int(workers) if workers.isdigit() and int(workers) > 0 else 8
+refreshed = str(date.today())
+updated = 0
+for address, metrics, error in fetchOrdered(lines, getMetrics, workers, workers):
+    if error:
+        if isNotFound(error): print("Article not found: " + address)
+        else: print("Failed to open article {}: {}. Skipping.".format(address, error))
+        continue
+    views, shares, comments, hotness = metrics
+    cursor.execute(query, (views, shares, comments, hotness, refreshed, int(re.findall("\d+$", address)[0])))
+    updated += cursor.rowcount
+    print("{}: {} views, {} shares, {} comments, hotness {}".format(address, views, shares, comments, hotness))
+connection.commit()
+connection.close()
+
+print("{} articles refreshed.".format(updated))
+print(stats.report())
+print(client.report())
+print("Finished in %s seconds." % "{0:.3f}".format(t() - start))
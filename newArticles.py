@@ -8,66 +8,35 @@ Dependencies: modules tagRelevance, tagSimilarity
 """
 
 from datetime import datetime, date, timedelta
-import urllib.request
-from bs4 import BeautifulSoup as bs
+from parserBackend import parse
 import sqlite3
 import openpyxl
 import re
 from time import time as t
 from tagSimilarity import tagSimilarity
 from tagRelevance import tagRelevance
+from httpClient import client
+from dayIndex import dayURLs
+from concurrentFetch import fetchOrdered
+from retryPolicy import isNotFound
+from htmlArchive import HTMLArchive
+from batchWriter import BatchWriter
+from tagDictionary import getDictionary, writeRelations
+from schema import dropArticles, migrate
 
 class DateError(Exception):
     pass
 
-def dateGenerator(begin, end):
-    """
-    Generates dates from a given time interval.
-    :param begin: start of interval
-    :param end: end of interval, end >= start
-    :return: dates in YYY-MM-DD format from interval
-    """
-    current = begin
-    while current <= end:
-        yield current
-        current += timedelta(days=1)
-
 start = t()
+archive = HTMLArchive("archive") # fetched pages are kept for parsing again without fetching
 """
 SQL table schema.
 """
 connection = sqlite3.connect("daily.sqlite")
 cursor = connection.cursor()
-cursor.executescript("""
-    DROP TABLE IF EXISTS Articles;
-    DROP TABLE IF EXISTS Tags;
-    DROP TABLE IF EXISTS Relations;
-
-    CREATE TABLE Articles (
-    id          INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT UNIQUE,
-    idnum       INTEGER UNIQUE,
-    address     TEXT,
-    section     TEXT,
-    author      TEXT,
-    time        TEXT,
-    title       TEXT,
-    label       TEXT,
-    lead        TEXT,
-    content     TEXT,
-    important   TEXT,
-    tags        INTEGER,
-    similarity  INTEGER,
-    relevance   REAL);
-
-    CREATE TABLE Tags (
-    id          INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT UNIQUE,
-    tag         TEXT UNIQUE);
-
-    CREATE TABLE Relations (
-    id_article  INTEGER,
-    id_tag      INTEGER,
-    PRIMARY KEY (id_article, id_tag))
-    """)
+dropArticles(connection) # daily database is built anew on every run
+migrate(connection) # see module schema
+batch = BatchWriter(connection) # commits every 100 articles or 5 seconds
 """
 Fetching new URLs
 """
@@ -99,18 +68,6 @@ else:
         except AssertionError: print("Date not in required format. Enter a date in YYYY-M-D format.")
         except ValueError: print("Date not valid. Enter a valid date.")
         except DateError: print("End date before start date. Enter valid end date.")
-fh = open("daily.txt", "w", encoding="UTF-8")
-fh.write("URLs fetched on " + str(datetime.now()) + "\n")
-fh.write("Articles from " + str(begin_date) + " to " + str(end_date) + "\n")
-pattern = re.compile("href=\"(.+)\"\stitle")
-for dt in dateGenerator(begin_date, end_date):
-    print(dt)
-    html = urllib.request.urlopen("http://siol.net/pregled-dneva/" + re.sub("-0", "-", str(dt)))
-    soup = bs(html, "html5lib")  # html5lib OR lxml
-    articles = re.findall(pattern, str(soup.find_all("ul", class_="timemachine__article_list")))
-    for article in articles:
-        fh.write("http://siol.net" + article + "\n")
-fh.close()
 """
 xls file
 """
@@ -122,110 +79,120 @@ counter = 1
 """
 Parsing of articles from URLs.
 """
-for line in open("daily.txt").readlines():
-    if "http://" in line:
-        try: html = urllib.request.urlopen(line.rstrip()).read()
-        except urllib.error.HTTPError:
-            open("articles_404.txt", "a", encoding="UTF-8").write(line[:-1])
-            print("Article not found: " + line.rstrip())
-            continue
-        soup = bs(html, "html5lib") # html5lib OR lxml
-        # address (url) of article
-        address = line.rstrip()
-        print(address)
-        # article ID
-        id = int(re.findall("\d+$", address)[0])
-        # section of article
-        try: section = re.findall("\.net/(.+)/", address)[0]
-        except IndexError: section = ""
-        # author(s) of article
-        authors = list()
-        authors.extend(re.findall(">(.*?)</h3>", str(soup.find_all("h3", class_="article__author_name"))))
-        authors.extend(re.findall(">(.*?)</h3>", str(soup.find_all("h3", class_="article__authors_name"))))
-        try: authors.insert(0, re.findall("<span>(.*?)</span>", str(soup.find_all("div", class_="article__promo")))[0])
-        except IndexError: pass
-        if not authors: authors = [""]
-        # publication time of artice
-        time = re.findall("(\d+-\d+-\d+)T", str(soup("time")[0]))[0]
-        # article title
-        title = re.findall(">(.*)<", str(soup("h1")[0]))[0]
-        # article label
-        label = re.findall(">(.*)<", str(soup("span", class_="article__label")[0]))[0]
-        # article lead, text only, no urls
-        try: lead = re.sub("<.+?>", "", re.findall(">(.*)<", str(soup("p")[0]))[0])
-        except IndexError: lead = ""
-        # main article content, text and headlines only, no urls, iframes
-        content_lines = str(soup.find_all("div", class_="article__content")[0]).split("\n")
-        content = str()
-        pattern = re.compile("<.+?>")
-        for line in content_lines:
-            if "<div" not in line and "</div>" not in line and "<a href" not in line and "iframe" not in line: content += re.sub(pattern, "", line) + "\n"
-        # important text (text in italic or bold)
-        important_set = set()
-        pattern = re.compile("<[se][tm]\w*>(.+?)</")
-        for line in content_lines:
-            if "<div" not in line and "</div>" not in line and "<a href" not in line and "iframe" not in line:
-                for item in re.findall(pattern, line): important_set.add(item.replace("\xa0", " "))
-        important = ", ".join(important_set)
-        # entire article
-        article = title + "\n\n" + label + "\n\n" + lead + "\n\n" + content
-        # article tags
-        tags = re.findall(">(.*?)</a>", str(soup.find_all("a", class_="tags__link")))
-        # number of tags
-        tag_number = len(tags)
-        # tag similarity index
-        similarity = tagSimilarity(tags)
-        # tag relevance index
-        relevance = tagRelevance(tags, important, article)
-        # database builder
-        cursor.execute("UPDATE Articles SET author = ? WHERE idnum = ?", (authors[0], id))
-        cursor.execute("""INSERT OR IGNORE INTO Articles  (address,
-                                                            idnum,
-                                                            section,
-                                                            author,
-                                                            time,
-                                                            title,
-                                                            label,
-                                                            lead,
-                                                            content,
-                                                            important,
-                                                            tags,
-                                                            similarity,
-                                                            relevance)
-                                                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                                                           (address,
-                                                            id,
-                                                            section,
-                                                            authors[0],
-                                                            time,
-                                                            title,
-                                                            label,
-                                                            lead,
-                                                            content,
-                                                            important,
-                                                            tag_number,
-                                                            similarity,
-                                                            relevance))
-        cursor.execute("SELECT id FROM Articles WHERE idnum = ?", (id,))
-        id_article = cursor.fetchone()[0]
-        for tag in tags:
-            cursor.execute("SELECT EXISTS (SELECT 1 FROM Tags WHERE tag = ?)", (tag,))
-            if cursor.fetchone()[0] == 0:
-                cursor.execute("INSERT INTO Tags (tag) VALUES (?)", (tag,))
-                cursor.execute("SELECT id FROM Tags WHERE tag = ?", (tag,))
-                id_tag = cursor.fetchone()[0]
-                cursor.execute("INSERT OR REPLACE INTO Relations (id_article, id_tag) VALUES (?, ?)", (id_article, id_tag))
-            else:
-                cursor.execute("SELECT id FROM Tags WHERE tag = ?", (tag,))
-                id_tag = cursor.fetchone()[0]
-                cursor.execute("INSERT OR REPLACE INTO Relations (id_article, id_tag) VALUES (?, ?)", (id_article, id_tag))
-        connection.commit()
-        # xls builder
-        a = "A" + str(counter)
-        b = "B" + str(counter)
-        sheet[a] = address
-        sheet[b] = authors[0]
-        counter += 1
+def discoveredAddresses(begin_date, end_date):
+    """
+    Generates URLs of articles as soon as day index pages are fetched, so that fetching of articles does not wait for all days.
+    Logs URLs to daily.txt.
+    :param begin_date: start of interval
+    :param end_date: end of interval, end >= start
+    :return: generator of article URLs
+    """
+    fh = open("daily.txt", "w", encoding="UTF-8")
+    fh.write("URLs fetched on " + str(datetime.now()) + "\n")
+    fh.write("Articles from " + str(begin_date) + " to " + str(end_date) + "\n")
+    for dt, articles in dayURLs(begin_date, end_date):
+        print(dt)
+        for article in articles:
+            fh.write(article + "\n")
+            fh.flush()
+            if "http://" in article: yield article
+    fh.close()
+
+for address, html, error in fetchOrdered(discoveredAddresses(begin_date, end_date)): # at most 2 * workers articles are fetched ahead of parsing
+    if error:
+        if isNotFound(error):
+            open("articles_404.txt", "a", encoding="UTF-8").write(address + "\n")
+            print("Article not found: " + address)
+        else: print("Failed to open article {}: {}. Skipping.".format(address, error))
+        continue
+    archive.storeArticle(address, html)
+    soup = parse(html)
+    # address (url) of article
+    print(address)
+    # article ID
+    id = int(re.findall("\d+$", address)[0])
+    # section of article
+    try: section = re.findall("\.net/(.+)/", address)[0]
+    except IndexError: section = ""
+    # author(s) of article
+    authors = list()
+    authors.extend(re.findall(">(.*?)</h3>", str(soup.find_all("h3", class_="article__author_name"))))
+    authors.extend(re.findall(">(.*?)</h3>", str(soup.find_all("h3", class_="article__authors_name"))))
+    try: authors.insert(0, re.findall("<span>(.*?)</span>", str(soup.find_all("div", class_="article__promo")))[0])
+    except IndexError: pass
+    if not authors: authors = [""]
+    # publication time of artice
+    time = re.findall("(\d+-\d+-\d+)T", str(soup("time")[0]))[0]
+    # article title
+    title = re.findall(">(.*)<", str(soup("h1")[0]))[0]
+    # article label
+    label = re.findall(">(.*)<", str(soup("span", class_="article__label")[0]))[0]
+    # article lead, text only, no urls
+    try: lead = re.sub("<.+?>", "", re.findall(">(.*)<", str(soup("p")[0]))[0])
+    except IndexError: lead = ""
+    # main article content, text and headlines only, no urls, iframes
+    content_lines = str(soup.find_all("div", class_="article__content")[0]).split("\n")
+    content = str()
+    pattern = re.compile("<.+?>")
+    for line in content_lines:
+        if "<div" not in line and "</div>" not in line and "<a href" not in line and "iframe" not in line: content += re.sub(pattern, "", line) + "\n"
+    # important text (text in italic or bold)
+    important_set = set()
+    pattern = re.compile("<[se][tm]\w*>(.+?)</")
+    for line in content_lines:
+        if "<div" not in line and "</div>" not in line and "<a href" not in line and "iframe" not in line:
+            for item in re.findall(pattern, line): important_set.add(item.replace("\xa0", " "))
+    important = ", ".join(important_set)
+    # entire article
+    article = title + "\n\n" + label + "\n\n" + lead + "\n\n" + content
+    # article tags
+    tags = re.findall(">(.*?)</a>", str(soup.find_all("a", class_="tags__link")))
+    # number of tags
+    tag_number = len(tags)
+    # tag similarity index
+    similarity = tagSimilarity(tags)
+    # tag relevance index
+    relevance = tagRelevance(tags, important, article)
+    # database builder
+    cursor.execute("UPDATE Articles SET author = ? WHERE idnum = ?", (authors[0], id))
+    cursor.execute("""INSERT OR IGNORE INTO Articles  (address,
+                                                        idnum,
+                                                        section,
+                                                        author,
+                                                        time,
+                                                        title,
+                                                        label,
+                                                        lead,
+                                                        content,
+                                                        important,
+                                                        tags,
+                                                        similarity,
+                                                        relevance)
+                                                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                                                       (address,
+                                                        id,
+                                                        section,
+                                                        authors[0],
+                                                        time,
+                                                        title,
+                                                        label,
+                                                        lead,
+                                                        content,
+                                                        important,
+                                                        tag_number,
+                                                        similarity,
+                                                        relevance))
+    cursor.execute("SELECT id FROM Articles WHERE idnum = ?", (id,))
+    id_article = cursor.fetchone()[0]
+    writeRelations(cursor, id_article, tags)
+    batch.written()
+    # xls builder
+    a = "A" + str(counter)
+    b = "B" + str(counter)
+    sheet[a] = address
+    sheet[b] = authors[0]
+    counter += 1
+batch.commit()
 connection.close()
 while True:
     try:
@@ -233,4 +200,9 @@ while True:
         break
     except PermissionError: input("Please close daily.xlsx and press any key. ")
 
+print(batch.report())
+print(getDictionary(cursor).report())
+print(archive.report())
+archive.close()
+print(client.report())
 print("Finished in %s seconds." % "{0:.3f}".format(t() - start))
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""
+Module for parsing HTML with a selectable parser backend. See details in method specification below.
+Backends:
+    html5lib     BS4 tree builder, pure Python, most lenient, slowest (default)
+    lxml         BS4 tree builder, C-based (libxml2)
+    html.parser  BS4 tree builder, Python standard library, no extra dependency
+    lexbor       selectolax (C-based lexbor HTML5 parser, pip install selectolax), fastest; its tree is wrapped in LexborTag
+                 objects with the part of the BS4 interface used by the extractors
+All backends give BS4 soup objects or LexborTag objects, so getArticle/getComments work unchanged; use parserBenchmark.py
+to check that a backend gives identical article and comments data and to compare backend speed.
+parseArticle() and parseComments() build only the regions of the page that data is extracted from (title, author, dates,
+lead, content, tags, views, shares, hotness, comments) and skip navigation, ads and scripts. html5lib and lexbor always
+build the whole page (they do not support partial parsing), lxml and html.parser build only the listed regions.
+"""
+
+from bs4 import BeautifulSoup as bs
+from bs4 import FeatureNotFound, SoupStrainer
+try: from selectolax.lexbor import LexborHTMLParser
+except ImportError: LexborHTMLParser = None # selectolax not installed, lexbor backend is not available
+
+BACKENDS = ("html5lib", "lxml", "html.parser", "lexbor")
+backend = "html5lib"
+
+# regions of article page read by getArticle, getComments and comments crawling: tag names and classes
+ARTICLE_TAGS = {"h1"}
+ARTICLE_CLASSES = {"article__author", "article__pr_box", "article__publish_date--date", "article__publish_date--time",
+                   "article__overtitle", "article__intro", "article__main", "article__tags--tag", "article__views",
+                   "article__total_shares", "comments__post_count", "article__hotness", "comments__list",
+                   "comments__show_all", "comments__show_all--button"}
+# regions of dedicated comments page: comments list and pagination
+COMMENTS_TAGS = set()
+COMMENTS_CLASSES = {"comments__list", "pagination__item"}
+
+def available():
+    """
+    Finds installed parser backends.
+    :return: list, names of installed backends
+    """
+    installed = list()
+    for name in BACKENDS:
+        if name == "lexbor":
+            if LexborHTMLParser: installed.append(name)
+            continue
+        try:
+            bs("<p></p>", name)
+            installed.append(name)
+        except FeatureNotFound: pass
+    return installed
+
+def setBackend(name):
+    """
+    Sets parser backend used by parse().
+    :param name: str, name of backend
+    """
+    global backend
+    if name not in BACKENDS: raise ValueError("Unknown parser backend: {}. Choose from: {}.".format(name, ", ".join(BACKENDS)))
+    backend = name
+
+def getBackend(): return backend
+
+def chooseBackend():
+    """
+    Asks user for parser backend of the run and sets it.
+    """
+    while True:
+        name = input("Enter HTML parser ({}; default {}): ".format(", ".join(available()), backend))
+        if not name: return
+        if name in available():
+            setBackend(name)
+            return
+        print("Parser not installed or unknown. Enter a valid parser.")
+
+def parse(html, name=None):
+    """
+    Parses HTML.
+    :param html: str, HTML of page
+    :param name: str, name of backend, backend set by setBackend() if None
+    :return: BS4 soup object (LexborTag object of document with lexbor)
+    """
+    name = name or backend
+    if name == "lexbor": return LexborTag(LexborHTMLParser(html).root.parent)
+    return bs(html, name)
+
+class LexborTag(object):
+    """
+    LexborTag object wrapping an element of a selectolax (lexbor) tree with the part of the BS4 Tag interface used by
+    getArticle, getComments and the comments crawl: name, get(), find_all() (also as call), find(), getText(), parent and str().
+    Classes are matched as in BS4 (single class or whole class attribute).
+    """
+    __slots__ = ("node",)
+    def __init__(self, node): self.node = node
+    @property
+    def name(self): return self.node.tag
+    @property
+    def attrs(self): return self.node.attributes
+    @property
+    def parent(self): return LexborTag(self.node.parent) if self.node.parent else None
+    def get(self, attribute, default=None):
+        """
+        :param attribute: str, name of attribute
+        :param default: value if element has no such attribute
+        :return: value of attribute, list of classes for class attribute
+        """
+        value = self.node.attributes.get(attribute, default)
+        if attribute == "class" and isinstance(value, str): return value.split()
+        return value
+    def find_all(self, name=True, class_=None):
+        """
+        :param name: str, tag name, True for any tag
+        :param class_: str, class or whole class attribute, None for any
+        :return: list, LexborTag objects of matching descendants in document order
+        """
+        nodes = self.node.css("*" if name is True else name)
+        if class_ is not None:
+            nodes = [node for node in nodes if hasClass(node.attributes.get("class"), class_)]
+        return [LexborTag(node) for node in nodes]
+    __call__ = find_all
+    def find(self, name=True, class_=None):
+        """
+        :param name: str, tag name, True for any tag
+        :param class_: str, class or whole class attribute, None for any
+        :return: LexborTag object of first matching descendant or None
+        """
+        if class_ is None:
+            node = self.node.css_first("*" if name is True else name)
+            return LexborTag(node) if node else None
+        found = self.find_all(name, class_)
+        return found[0] if found else None
+    def getText(self): return self.node.text(deep=True)
+    get_text = getText
+    def __contains__(self, item): return any(child.tag == "-text" and child.text_content == item for child in self.node.iter(include_text=True)) # as BS4: item in direct children (strings)
+    def __str__(self): return self.node.html
+    __repr__ = __str__
+
+def hasClass(value, class_):
+    """
+    :param value: str, class attribute of element or None
+    :param class_: str, class or whole class attribute (classes separated by single spaces)
+    :return: bool, True if element has class or its class attribute is class_
+    """
+    if value is None: return False
+    classes = value.split()
+    return class_ in classes or class_ == " ".join(classes)
+
+class Regions(SoupStrainer):
+    """
+    Regions object for parsing only elements with given tag names or classes. Descendants of accepted elements are kept.
+    """
+    def __init__(self, tags, classes):
+        """
+        :param tags: set, tag names
+        :param classes: set, classes
+        """
+        self.tags = tags
+        self.classes = classes
+        SoupStrainer.__init__(self, self.accept)
+    def accept(self, name, attrs=None):
+        """
+        Checks if element is accepted (called by BS4 versions before 4.13).
+        :param name: str, tag name, or BS4 element tag
+        :param attrs: dict, attributes of tag
+        :return: bool, True if element is accepted
+        """
+        if attrs is None:
+            if isinstance(name, str): return True # tag name only, attributes are checked separately
+            name, attrs = name.name, name.attrs
+        if name in self.tags: return True
+        value = dict(attrs).get("class") or ""
+        return any(item in self.classes for item in (value.split() if isinstance(value, str) else value))
+    def allow_tag_creation(self, nsprefix, name, attrs): return self.accept(name, attrs or {}) # BS4 4.13 and later
+
+article_regions = Regions(ARTICLE_TAGS, ARTICLE_CLASSES)
+comments_regions = Regions(COMMENTS_TAGS, COMMENTS_CLASSES)
+
+def parseRegions(html, strainer, name=None):
+    """
+    Parses only regions of HTML accepted by strainer (whole HTML with html5lib, which does not support partial parsing).
+    :param html: str, HTML of page
+    :param strainer: Regions object
+    :param name: str, name of backend, backend set by setBackend() if None
+    :return: BS4 soup object
+    """
+    name = name or backend
+    if name in ("html5lib", "lexbor"): return parse(html, name)
+    return bs(html, name, parse_only=strainer)
+
+def parseArticle(html, name=None):
+    """
+    Parses regions of article page used for article and comments data.
+    :param html: str, HTML of article page
+    :param name: str, name of backend, backend set by setBackend() if None
+    :return: BS4 soup object
+    """
+    return parseRegions(html, article_regions, name)
+
+def parseComments(html, name=None):
+    """
+    Parses regions of dedicated comments page used for comments data.
+    :param html: str, HTML of comments page
+    :param name: str, name of backend, backend set by setBackend() if None
+    :return: BS4 soup object
+    """
+    return parseRegions(html, comments_regions, name)
@@ -0,0 +1,222 @@
+"""
+Module for comparing HTML parser backends on recorded article pages.
+1: records article pages (and first pages of their dedicated comments websites) from URLs in a .txt file to a folder.
+2: parses recorded pages with every installed parser backend, whole pages and only extracted regions (targeted), checks that
+   getArticle and getComments give data identical to the html5lib backend (differential test) and measures pages parsed
+   per second and elements built per page for each backend.
+3: parses comments threads of recorded pages with getComments and with its previous version (which searched every thread
+   again for every comment), checks that both give identical comments and compares their speed.
+Recorded pages are listed in the pages.txt file of the folder, one "URL<tab>file name<tab>kind" line per page (kind: article or comments).
+Dependencies: modules articleParser, parserBackend, records
+"""
+
+import os
+import re
+from time import time as t
+from articleParser import getArticle, getComments
+from httpClient import client
+from parserBackend import available, parse, parseArticle, parseComments
+from records import Article, Comment
+
+def recordPages(file_name, folder):
+    """
+    Saves article pages and first pages of their dedicated comments websites to a folder.
+    :param file_name: str, name of .txt file with URLs
+    :param folder: str, name of folder for recorded pages
+    :return: int, number of recorded pages
+    """
+    os.makedirs(folder, exist_ok=True)
+    index = open(os.path.join(folder, "pages.txt"), "a", encoding="UTF-8")
+    recorded = 0
+    for line in open(file_name).readlines():
+        if "http://" in line or "https://" in line:
+            address = line.rstrip()
+            idnum = re.findall(r"\d+$", address)[0]
+            html = client.fetch(address)
+            open(os.path.join(folder, idnum + ".html"), "w", encoding="UTF-8").write(html)
+            index.write("{}\t{}\tarticle\n".format(address, idnum + ".html"))
+            recorded += 1
+            button = parse(html, "html5lib").find("a", class_="comments__show_all--button")
+            if button:
+                open(os.path.join(folder, idnum + "_comments.html"), "w", encoding="UTF-8").write(client.fetch("https://siol.net" + button.get("href")))
+                index.write("{}\t{}\tcomments\n".format(address, idnum + "_comments.html"))
+                recorded += 1
+            print(address)
+    index.close()
+    return recorded
+
+def loadPages(folder):
+    """
+    Loads recorded pages from a folder.
+    :param folder: str, name of folder with recorded pages
+    :return: list, (URL, HTML, kind) tuples
+    """
+    pages = list()
+    for line in open(os.path.join(folder, "pages.txt"), encoding="UTF-8").readlines():
+        address, file_name, kind = line.rstrip("\n").split("\t")
+        pages.append((address, open(os.path.join(folder, file_name), encoding="UTF-8").read(), kind))
+    return pages
+
+def parsePage(html, kind, backend, targeted):
+    """
+    Parses recorded page.
+    :param html: str, HTML of page
+    :param kind: str, article or comments
+    :param backend: str, name of parser backend
+    :param targeted: bool, True if only extracted regions are parsed
+    :return: BS4 soup object
+    """
+    if not targeted: return parse(html, backend)
+    if kind == "article": return parseArticle(html, backend)
+    return parseComments(html, backend)
+
+def extract(address, html, kind, backend, targeted=False):
+    """
+    Parses recorded page and extracts its data.
+    :param address: str, article URL
+    :param html: str, HTML of page
+    :param kind: str, article or comments
+    :param backend: str, name of parser backend
+    :param targeted: bool, True if only extracted regions are parsed
+    :return: tuple (dict of Article fields or None, list of dicts of Comment fields)
+    """
+    soup = parsePage(html, kind, backend, targeted)
+    if kind == "article":
+        article = getArticle(address, soup, Article).asDict()
+        comments_soup = soup.find("ul", class_="comments__list cf")
+        comments = getComments(address, comments_soup, True, Comment) if comments_soup else []
+    else:
+        article = None
+        comments = getComments(address, soup.find("ul", class_="comments__list cf "), False, Comment)
+    return article, [comment.asDict() for comment in comments]
+
+def compareBackends(pages, variants):
+    """
+    Compares data extracted with each backend to data extracted with html5lib backend from whole pages.
+    :param pages: list, (URL, HTML, kind) tuples
+    :param variants: list, (name of backend, targeted) tuples to compare
+    :return: dict, (name of backend, targeted) -> dict of field -> number of pages with different value of field
+    """
+    reference = [extract(address, html, kind, "html5lib") for address, html, kind in pages]
+    differences = dict()
+    for backend, targeted in variants:
+        fields = dict()
+        for (address, html, kind), (article_ref, comments_ref) in zip(pages, reference):
+            article, comments = extract(address, html, kind, backend, targeted)
+            if article_ref:
+                for field, value in article_ref.items():
+                    if article[field] != value: fields[field] = fields.get(field, 0) + 1
+            if comments != comments_ref: fields["comments list"] = fields.get("comments list", 0) + 1
+        differences[(backend, targeted)] = fields
+    return differences
+
+def benchmarkBackend(pages, backend, targeted, rounds):
+    """
+    Measures speed of parsing and extracting data from recorded pages and size of parsed trees.
+    :param pages: list, (URL, HTML, kind) tuples
+    :param backend: str, name of parser backend
+    :param targeted: bool, True if only extracted regions are parsed
+    :param rounds: int, number of times every page is parsed
+    :return: tuple (pages per second, average number of elements per page)
+    """
+    start = t()
+    for i in range(rounds):
+        for address, html, kind in pages: extract(address, html, kind, backend, targeted)
+    speed = len(pages) * rounds / (t() - start)
+    elements = sum(len(parsePage(html, kind, backend, targeted).find_all(True)) for address, html, kind in pages)
+    return speed, elements / len(pages)
+
+def getCommentsReference(address, content, level, Comment):
+    """
+    Previous version of getComments, which searches every thread again for every comment (quadratic in thread length).
+    Kept as reference for benchmarkComments.
+    """
+    comments = list()
+    if level: comments_data = content.find_all("span", class_="comments__inner comments__inner--toplevel cf js_oneComment")
+    else: comments_data = content.find_all("div", class_="comments__inner comments__inner--toplevel js_oneComment")
+    for comment_data in comments_data:
+        first_comment = None
+        for i in range(len(comment_data.find_all("span", class_="comments__username"))):
+            user = comment_data.find_all("span", class_="comments__username")[i].getText()
+            text = comment_data.find_all("p", class_="comments__text")[i].getText()
+            date_time = comment_data.find_all("span", class_="comments__timestamp")[i].getText()
+            date = "-".join(re.findall(r"\d+(?=\.)", date_time)[::-1])
+            time = re.findall(r"(?<=ob\s).+", date_time)[0] + ":00"
+            try:
+                votes = comment_data.find_all("span", class_="vote_count")
+                up = int(votes[i*2].getText())
+                down = int(votes[i*2+1].getText())
+            except IndexError:
+                up = None
+                down = None
+            comment_object = Comment(address, user, text, date, time, up, down)
+            if i == 0: first_comment = comment_object.getHashValue()
+            else: comment_object.setReplyTo(first_comment)
+            comments.append(comment_object)
+    return comments
+
+def benchmarkComments(pages, rounds):
+    """
+    Compares getComments to its previous version on comments threads of recorded pages.
+    :param pages: list, (URL, HTML, kind) tuples
+    :param rounds: int, number of times every thread is parsed
+    :return: tuple (number of comments, length of longest thread, True if both versions give identical comments, seconds of previous version, seconds of getComments)
+    """
+    lists = list()
+    for address, html, kind in pages:
+        soup = parse(html, "html5lib")
+        if kind == "article": lists.append((address, soup.find("ul", class_="comments__list cf"), True))
+        else: lists.append((address, soup.find("ul", class_="comments__list cf "), False))
+    lists = [(address, content, level) for address, content, level in lists if content]
+    longest = max([len(thread.find_all("span", class_="comments__username")) for address, content, level in lists for thread in content.find_all(True, class_="js_oneComment")] or [0])
+    comments = 0
+    identical = True
+    for address, content, level in lists:
+        new = [comment.asDict() for comment in getComments(address, content, level, Comment)]
+        identical = identical and new == [comment.asDict() for comment in getCommentsReference(address, content, level, Comment)]
+        comments += len(new)
+    times = list()
+    for function in (getCommentsReference, getComments):
+        start = t()
+        for i in range(rounds):
+            for address, content, level in lists: function(address, content, level, Comment)
+        times.append(t() - start)
+    return comments, longest, identical, times[0], times[1]
+
+def variantName(backend, targeted):
+    """
+    :param backend: str, name of parser backend
+    :param targeted: bool, True if only extracted regions are parsed
+    :return: str, name of backend and parse mode
+    """
+    return backend + (" (targeted)" if targeted else "")
+
+while True:
+    choice_menu = input("{}{}{}{}".format("1: record article pages from URLs\n",
+                                          "2: compare and benchmark parser backends on recorded pages\n",
+                                          "3: compare and benchmark comments parsing on recorded pages\n",
+                                          "X: exit\n"))
+    if choice_menu in ("1", "2", "3", "X", "x"): break
+    else: print("\nPlease enter a valid choice.\n\n")
+if choice_menu == "1":
+    file_name = input("Enter file name: ")
+    folder = input("Enter folder for recorded pages: ")
+    print("{} pages recorded to {}.".format(recordPages(file_name, folder), folder))
+elif choice_menu in ("2", "3"):
+    pages = loadPages(input("Enter folder with recorded pages: "))
+    rounds = input("Enter number of benchmark rounds (default 3): ")
+    rounds = int(rounds) if rounds.isdigit() and int(rounds) > 0 else 3
+if choice_menu == "3":
+    comments, longest, identical, reference, seconds = benchmarkComments(pages, rounds)
+    print("\n{} comments, longest thread {} comments, results {}.".format(comments, longest, "identical" if identical else "DIFFERENT"))
+    print("previous getComments: {:.1f} comments/s".format(comments * rounds / reference if reference else 0.0))
+    print("getComments: {:.1f} comments/s".format(comments * rounds / seconds if seconds else 0.0))
+elif choice_menu == "2":
+    backends = available()
+    variants = [(backend, targeted) for backend in backends for targeted in (False, True) if not (targeted and backend == "html5lib")] # html5lib always parses whole pages
+    print("\n{} recorded pages, parser backends: {}\n".format(len(pages), ", ".join(backends)))
+    for (backend, targeted), fields in compareBackends(pages, [variant for variant in variants if variant != ("html5lib", False)]).items():
+        if fields: print("{}: DIFFERENT from html5lib in {}".format(variantName(backend, targeted), ", ".join("{} ({} pages)".format(field, count) for field, count in sorted(fields.items()))))
+        else: print("{}: identical to html5lib".format(variantName(backend, targeted)))
+    print()
+    for backend, targeted in variants: print("{}: {:.1f} pages/s, {:.0f} elements/page".format(variantName(backend, targeted), *benchmarkBackend(pages, backend, targeted, rounds)))
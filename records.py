@@ -0,0 +1,121 @@
+"""
+Module with record types for article and comments data, shared by all scripts. See details in method specification below.
+Records use __slots__ (no per-instance __dict__), so large batches of articles and comments held in memory stay small,
+and are converted directly to rows for executemany (column order of INSERT/UPDATE statements of Articles and Comments tables).
+"""
+
+from hashlib import md5
+from operator import attrgetter
+
+# columns of Articles table in INSERT statement: address, idnum, section, author, coauthors, time, hour, title, label, lead,
+# content, important, tags, similarity, relevance, views, comments, shares, hotness, refreshed
+ARTICLE_INSERT_ROW = attrgetter("address", "idnum", "section", "author", "coauthors", "date", "time", "title", "label", "lead",
+                                "content", "important", "tag_number", "similarity", "relevance", "views", "comments", "shares", "hotness", "refreshed")
+# columns of Articles table in UPDATE statement (SET ... WHERE idnum = ?): as in INSERT statement without idnum, idnum last
+ARTICLE_UPDATE_ROW = attrgetter("address", "section", "author", "coauthors", "date", "time", "title", "label", "lead",
+                                "content", "important", "tag_number", "similarity", "relevance", "views", "comments", "shares", "hotness", "refreshed", "idnum")
+# columns of Articles table in UPDATE statement of reparsed (archived) pages: as in UPDATE statement without metrics
+# (views, comments, shares, hotness, refreshed), which are out of date in archived pages
+ARTICLE_REPARSE_ROW = attrgetter("address", "section", "author", "coauthors", "date", "time", "title", "label", "lead",
+                                 "content", "important", "tag_number", "similarity", "relevance", "idnum")
+# columns of Comments table after id_article: address, user, text, date, time, up, down, reply_to, hash_value
+COMMENT_ROW = attrgetter("address", "user", "text", "date", "time", "up", "down", "reply_to", "hash_value")
+
+class Article(object):
+    """
+    Article object for storing article data.
+    """
+    __slots__ = ("idnum", "address", "section", "author", "coauthors", "date", "time", "title", "label", "lead", "content", "important",
+                 "tags", "tag_number", "similarity", "relevance", "views", "shares", "comments", "hotness", "refreshed")
+    def __init__(self, idnum, address, section, author, coauthors, date, time, title, label, lead, content, important, tags, tag_number, similarity, relevance, views, shares, comments, hotness, refreshed):
+        self.idnum = idnum
+        self.address = address
+        self.section = section
+        self.author = author
+        self.coauthors = coauthors
+        self.date = date
+        self.time = time
+        self.title = title
+        self.label = label
+        self.lead = lead
+        self.content = content
+        self.important = important
+        self.tags = tags
+        self.tag_number = tag_number
+        self.similarity = similarity
+        self.relevance = relevance
+        self.views = views
+        self.shares = shares
+        self.comments = comments
+        self.hotness = hotness
+        self.refreshed = refreshed
+    def getIdnum(self): return self.idnum
+    def getAddress(self): return self.address
+    def getSection(self): return self.section
+    def getAuthor(self): return self.author
+    def getCoauthors(self): return self.coauthors
+    def getDate(self): return self.date
+    def getTime(self): return self.time
+    def getTitle(self): return self.title
+    def getLabel(self): return self.label
+    def getLead(self): return self.lead
+    def getContent(self): return self.content
+    def getImportant(self): return self.important
+    def getTags(self): return self.tags
+    def getTagNumber(self): return self.tag_number
+    def getSimilarity(self): return self.similarity
+    def getRelevance(self): return self.relevance
+    def getViews(self): return self.views
+    def getShares(self): return self.shares
+    def getComments(self): return self.comments
+    def getHotness(self): return self.hotness
+    def getRefreshed(self): return self.refreshed
+    def getInsertRow(self):
+        """
+        :return: tuple, values for INSERT INTO Articles (address, idnum, ..., refreshed)
+        """
+        return ARTICLE_INSERT_ROW(self)
+    def getUpdateRow(self):
+        """
+        :return: tuple, values for UPDATE Articles SET address = ?, ..., refreshed = ? WHERE idnum = ?
+        """
+        return ARTICLE_UPDATE_ROW(self)
+    def getReparseRow(self):
+        """
+        :return: tuple, values for UPDATE Articles SET address = ?, ..., relevance = ? WHERE idnum = ?
+        """
+        return ARTICLE_REPARSE_ROW(self)
+    def asDict(self): return {name: getattr(self, name) for name in self.__slots__}
+
+class Comment(object):
+    """
+    Comment object for storing comment data.
+    """
+    __slots__ = ("address", "user", "text", "date", "time", "up", "down", "reply_to", "hash_value")
+    def __init__(self, address, user, text, date, time, up, down, reply_to=None):
+        self.address = address
+        self.user = user
+        self.text = text
+        self.date = date
+        self.time = time
+        self.up = up
+        self.down = down
+        self.reply_to = reply_to
+        self.hash_value = md5(bytes(user + text + date + time, encoding="UTF-8")).hexdigest() # attempts to create a unique value for comment based on its user, text, date and time
+    def getAddress(self): return self.address
+    def getUser(self): return self.user
+    def getText(self): return self.text
+    def getDate(self): return self.date
+    def getTime(self): return self.time
+    def getUp(self): return self.up
+    def getDown(self): return self.down
+    def setReplyTo(self, reply_to_comment): self.reply_to = reply_to_comment
+    def getReplyTo(self): return self.reply_to
+    def getHashValue(self): return self.hash_value
+    def getRow(self, id_article):
+        """
+        :param id_article: int, ID of article in database
+        :return: tuple, values for INSERT INTO Comments (id_article, address, user, text, date, time, up, down, reply_to, hash_value)
+        """
+        return (id_article,) + COMMENT_ROW(self)
+    def asDict(self): return {name: getattr(self, name) for name in self.__slots__}
@@ -0,0 +1,107 @@
+"""
+Module for re-processing dead letters (pages that failed to parse, see module deadLetters) in bulk, once the parser is fixed.
+Saved pages are parsed again without fetching them. Articles are inserted into the database they were meant for, or updated
+if they already exist there; comments from dedicated comments website of re-processed articles are fetched.
+Comments of saved comments pages are added to their articles.
+Re-processed dead letters are removed; pages that still fail to parse are kept (number of attempts is increased).
+"""
+
+import urllib.error
+import re
+import sqlite3
+from time import time as t
+from articleFromHTML import writeArticle as insertArticle
+from updateArticlesFromHTML import writeArticle as updateArticle
+from articleParser import commentRows
+from articlePipeline import ExtractionError, ParserPool
+from deadLetters import DeadLetters
+from parserBackend import chooseBackend, getBackend
+from httpClient import client
+from schema import migrate
+
+def writeDeadLetter(cursor, article, comments):
+    """
+    Writes re-processed article to database; new article is inserted, existing article is updated.
+    :param cursor: SQLite cursor
+    :param article: Article object
+    :param comments: list, Comment objects
+    """
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM Articles WHERE idnum = ?)", (article.getIdnum(),))
+    if cursor.fetchone()[0]: updateArticle(cursor, ("article", article, comments, None))
+    else: insertArticle(cursor, (article, comments))
+
+if __name__ == "__main__":
+    start = t()
+    chooseBackend()
+    workers = input("Enter number of concurrent fetchers for comments (default 8): ")
+    workers = int(workers) if workers.isdigit() and int(workers) > 0 else 8
+    processes = input("Enter number of parser processes (default number of CPU cores): ")
+    processes = int(processes) if processes.isdigit() and int(processes) > 0 else None
+    dead_letters = DeadLetters("deadletters.sqlite")
+    parsers = ParserPool(getBackend(), processes, dead_letters=dead_letters)
+    reprocessed = 0
+    failed = 0
+    for database in dead_letters.databases():
+        print("Database: {}".format(database))
+        dead_letters.setDatabase(database) # pages that still fail are saved again for the same database
+        connection = sqlite3.connect(database)
+        migrate(connection) # see module schema
+        cursor = connection.cursor()
+        done = list() # IDs of re-processed dead letters
+        """
+        Article pages.
+        """
+        letters = dead_letters.entries(database, "article")
+        ids = {address: id for id, address, url, page, html in letters}
+        for address, parsed, error in parsers.articles((address, html, None) for id, address, url, page, html in letters):
+            if error:
+                print("Failed to extract article {}: {}. Kept in dead letters.".format(address, error))
+                failed += 1
+                continue
+            print(address)
+            article, comments, comments_url = parsed
+            if comments_url:
+                try: comments.extend(parsers.comments(address, comments_url, workers)[0])
+                except (urllib.error.URLError, ExtractionError) as e: # comments are added on next update
+                    print("Failed to get comments of article {}: {}. Skipping comments.".format(address, e))
+            writeDeadLetter(cursor, article, comments)
+            done.append(ids[address])
+        """
+        Comments pages (after article pages, which may have added their articles).
+        """
+        for id, address, url, page, html in dead_letters.entries(database, "comments"):
+            try: comments = parsers.commentsPage(address, url, html, page)[0]
+            except ExtractionError as e:
+                print("Failed to extract comments page {}: {}. Kept in dead letters.".format(url, e))
+                failed += 1
+                continue
+            cursor.execute("SELECT id FROM Articles WHERE idnum = ?", (int(re.findall(r"\d+$", address)[0]),))
+            row = cursor.fetchone()
+            if row is None:
+                print("Article of comments page {} not in database. Kept in dead letters.".format(url))
+                failed += 1
+                continue
+            print(url)
+            cursor.executemany("""INSERT OR IGNORE INTO Comments (id_article,
+                                                                  address,
+                                                                  user,
+                                                                  text,
+                                                                  date,
+                                                                  time,
+                                                                  up,
+                                                                  down,
+                                                                  reply_to,
+                                                                  hash_value)
+                                                                  VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", commentRows(row[0], comments))
+            done.append(id)
+        connection.commit()
+        connection.close()
+        dead_letters.remove(done)
+        reprocessed += len(done)
+    parsers.close()
+
+    print("{} dead letters re-processed, {} still failing.".format(reprocessed, failed))
+    print(dead_letters.report())
+    dead_letters.close()
+    print(client.report())
+    print("Finished in %s seconds." % "{0:.3f}".format(t() - start))
@@ -0,0 +1,150 @@
+"""
+Module for caching fetched pages on disk. See details in method specification below.
+Pages are stored compressed in an SQLite file, keyed by URL, together with their ETag and Last-Modified headers,
+which are used to revalidate cached pages with conditional requests (If-None-Match/If-Modified-Since).
+When the total size of stored pages exceeds the given limit, least recently used pages are evicted.
+"""
+
+import http.client
+import sqlite3
+import threading
+import zlib
+from time import time as t
+
+class CachedPage(object):
+    """
+    CachedPage object for storing data of a cached page.
+    """
+    def __init__(self, url, etag, last_modified, content_type, body, stored):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+        self.body = body
+        self.stored = stored
+    def getUrl(self): return self.url
+    def getEtag(self): return self.etag
+    def getLastModified(self): return self.last_modified
+    def getBody(self): return self.body
+    def getStored(self): return self.stored
+    def getHeaders(self):
+        headers = http.client.HTTPMessage()
+        if self.content_type: headers["Content-Type"] = self.content_type
+        if self.etag: headers["ETag"] = self.etag
+        if self.last_modified: headers["Last-Modified"] = self.last_modified
+        return headers
+
+class ResponseCache(object):
+    """
+    ResponseCache object for storing fetched pages in an SQLite file.
+    Thread-safe; can be shared by concurrent fetchers.
+    """
+    def __init__(self, path="responses.sqlite", max_size=512 * 1024 * 1024, max_age=0):
+        """
+        :param path: str, name of cache file
+        :param max_size: int, maximum size of stored (compressed) pages in bytes
+        :param max_age: int, seconds after storing in which a page is served from cache without revalidation
+        """
+        self.max_size = max_size
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+
+            CREATE TABLE IF NOT EXISTS Responses (
+            url             TEXT NOT NULL PRIMARY KEY,
+            etag            TEXT,
+            last_modified   TEXT,
+            content_type    TEXT,
+            body            BLOB,
+            size            INTEGER,
+            stored          REAL,
+            accessed        REAL);
+
+            CREATE INDEX IF NOT EXISTS Responses_accessed ON Responses (accessed)
+            """)
+        self.size = self.connection.execute("SELECT TOTAL(size) FROM Responses").fetchone()[0]
+        self.hits = 0 # served from cache without request
+        self.revalidated = 0 # served from cache after 304 Not Modified
+        self.misses = 0
+        self.stored_bytes = 0
+        self.page_bytes = 0
+    def lookup(self, url):
+        """
+        Looks up cached page.
+        :param url: str, page URL
+        :return: CachedPage object or None if page not in cache
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT etag, last_modified, content_type, body, stored FROM Responses WHERE url = ?", (url,)).fetchone()
+        if not row: return None
+        return CachedPage(url, row[0], row[1], row[2], zlib.decompress(row[3]), row[4])
+    def isFresh(self, page): return t() - page.getStored() < self.max_age
+    def conditionalHeaders(self, page, headers=None):
+        """
+        Adds revalidation headers of cached page to request headers.
+        :param page: CachedPage object or None
+        :param headers: dict, request headers
+        :return: dict, request headers
+        """
+        headers = dict(headers or dict())
+        if page:
+            if page.getEtag(): headers["If-None-Match"] = page.getEtag()
+            if page.getLastModified(): headers["If-Modified-Since"] = page.getLastModified()
+        return headers
+    def hit(self, page, revalidated=False):
+        """
+        Records use of cached page.
+        :param page: CachedPage object
+        :param revalidated: bool, True if page was confirmed by 304 Not Modified response
+        """
+        with self.lock:
+            if revalidated:
+                self.revalidated += 1
+                self.connection.execute("UPDATE Responses SET stored = ?, accessed = ? WHERE url = ?", (t(), t(), page.getUrl()))
+            else:
+                self.hits += 1
+                self.connection.execute("UPDATE Responses SET accessed = ? WHERE url = ?", (t(), page.getUrl()))
+            self.connection.commit()
+    def store(self, url, headers, body):
+        """
+        Stores fetched page and evicts least recently used pages if cache is full.
+        :param url: str, page URL
+        :param headers: response headers
+        :param body: bytes, decompressed page
+        """
+        compressed = zlib.compress(body, 6)
+        with self.lock:
+            self.misses += 1
+            self.page_bytes += len(body)
+            self.stored_bytes += len(compressed)
+            row = self.connection.execute("SELECT size FROM Responses WHERE url = ?", (url,)).fetchone()
+            if row: self.size -= row[0]
+            self.connection.execute("INSERT OR REPLACE INTO Responses (url, etag, last_modified, content_type, body, size, stored, accessed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (url, headers.get("ETag"), headers.get("Last-Modified"), headers.get("Content-Type"), compressed, len(compressed), t(), t()))
+            self.size += len(compressed)
+            if self.size > self.max_size: self.evict()
+            self.connection.commit()
+    def evict(self):
+        """
+        Deletes least recently used pages until cache is filled to 90 % of its maximum size. Caller must hold the lock.
+        """
+        for url, size in self.connection.execute("SELECT url, size FROM Responses ORDER BY accessed").fetchall():
+            if self.size <= self.max_size * 0.9: break
+            self.connection.execute("DELETE FROM Responses WHERE url = ?", (url,))
+            self.size -= size
+    def report(self):
+        """
+        Summarizes cache use.
+        :return: str, report of cache hits, misses and compression
+        """
+        with self.lock:
+            requests = self.hits + self.revalidated + self.misses
+            ratio = (self.hits + self.revalidated) / requests * 100 if requests else 0.0
+            compression = self.page_bytes / self.stored_bytes if self.stored_bytes else 0.0
+            return "Cache: {} hits, {} revalidated (304), {} misses, hit rate {:.1f} %, {:.1f} MB stored, compression {:.1f}x.".format(
+                self.hits, self.revalidated, self.misses, ratio, self.size / 1024 / 1024, compression)
+    def close(self):
+        with self.lock: self.connection.close()
@@ -0,0 +1,127 @@
+"""
+Module for retrying failed requests. See details in method specification below.
+Requests failing with a transient error (timeouts, connection errors, HTTP 408, 425, 429, 5xx) are retried with exponential backoff and jitter,
+honouring the Retry-After header of the response. Other errors (e.g. 404 Not Found) are raised immediately.
+A circuit breaker pauses all requests when the share of failed requests spikes, instead of hammering a throttling server.
+"""
+
+import random
+import threading
+import urllib.error
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import sleep, time as t
+
+class CircuitBreaker(object):
+    """
+    CircuitBreaker object for pausing requests when the error rate of recent requests is too high.
+    Thread-safe; shared by all fetchers using the same client.
+    """
+    def __init__(self, window=50, threshold=0.5, pause=60):
+        """
+        :param window: int, number of recent requests considered
+        :param threshold: float, error rate of recent requests at which requests are paused
+        :param pause: int, seconds to pause requests for
+        """
+        self.window = window
+        self.threshold = threshold
+        self.pause = pause
+        self.lock = threading.Lock()
+        self.outcomes = deque(maxlen=window)
+        self.paused_until = 0.0
+        self.trips = 0
+    def record(self, success):
+        """
+        Records outcome of request and trips breaker if error rate is too high.
+        :param success: bool, False if request failed with a transient error
+        """
+        with self.lock:
+            self.outcomes.append(success)
+            if len(self.outcomes) == self.window:
+                rate = self.outcomes.count(False) / self.window
+                if rate >= self.threshold:
+                    self.trips += 1
+                    self.paused_until = t() + self.pause
+                    self.outcomes.clear()
+                    print("{:.0f} % of recent requests failed, pausing requests for {} seconds.".format(rate * 100, self.pause))
+    def wait(self):
+        """
+        Blocks while breaker is tripped.
+        """
+        while True:
+            with self.lock: remaining = self.paused_until - t()
+            if remaining <= 0: return
+            sleep(remaining)
+
+class RetryPolicy(object):
+    """
+    RetryPolicy object for retrying requests failing with a transient error.
+    """
+    def __init__(self, tries=5, base_delay=1.0, max_delay=60.0, retry_statuses=(408, 425, 429, 500, 502, 503, 504), breaker=None):
+        """
+        :param tries: int, maximum number of attempts
+        :param base_delay: float, seconds to wait before first retry, doubled for every next retry
+        :param max_delay: float, maximum seconds to wait before a retry (also caps Retry-After)
+        :param retry_statuses: tuple, HTTP status codes to retry
+        :param breaker: CircuitBreaker object or None
+        """
+        self.tries = tries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+        self.breaker = breaker
+        self.lock = threading.Lock()
+        self.retries = 0
+    def isRetryable(self, error):
+        """
+        Classifies error as transient or permanent.
+        :param error: exception raised by request
+        :return: bool, True if request should be retried
+        """
+        if isinstance(error, urllib.error.HTTPError): return error.code in self.retry_statuses
+        return isinstance(error, (urllib.error.URLError, TimeoutError, ConnectionError))
+    def delay(self, attempt, error):
+        """
+        Computes delay before next attempt: Retry-After header if given, otherwise exponential backoff with full jitter.
+        :param attempt: int, number of failed attempts so far
+        :param error: exception raised by request
+        :return: float, seconds to wait
+        """
+        retry_after = error.headers.get("Retry-After") if isinstance(error, urllib.error.HTTPError) and error.headers else None
+        if retry_after:
+            try: return min(self.max_delay, max(0.0, float(retry_after)))
+            except ValueError:
+                try: return min(self.max_delay, max(0.0, (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()))
+                except (TypeError, ValueError): pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+    def call(self, function, *args):
+        """
+        Calls function, retrying it on transient errors.
+        :param function: function making request
+        :param args: arguments of function
+        :return: return value of function
+        """
+        for attempt in range(self.tries):
+            if self.breaker: self.breaker.wait()
+            try:
+                result = function(*args)
+                if self.breaker: self.breaker.record(True)
+                return result
+            except Exception as e:
+                retryable = self.isRetryable(e)
+                if self.breaker: self.breaker.record(not retryable)
+                if not retryable or attempt == self.tries - 1: raise
+                with self.lock: self.retries += 1
+                sleep(self.delay(attempt, e))
+    def report(self):
+        trips = self.breaker.trips if self.breaker else 0
+        return "Retries: {} retried requests, requests paused {} times.".format(self.retries, trips)
+
+def isNotFound(error):
+    """
+    Checks if request failed because page does not exist.
+    :param error: exception raised by request
+    :return: bool, True if page was not found (HTTP 404 or 410)
+    """
+    return isinstance(error, urllib.error.HTTPError) and error.code in (404, 410)
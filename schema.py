@@ -0,0 +1,361 @@
+"""
+Module with the database schema of articles databases, built by versioned migrations. See details in method specification below.
+Version of a database is kept in PRAGMA user_version; migrate() applies migrations newer than that version in order.
+Every migration is idempotent (tables and indexes are created if they do not exist, columns are added if missing),
+so databases created by older versions of the scripts, with one of their differing schemas, are brought to the same schema.
+    1   tables Articles, Tags, Relations, Comments, CommentState
+    2   columns missing in Articles tables of older schemas, column removed (set by updateArticlesFromHTML)
+    3   indexes for time ranges and sections of articles, articles of a tag and comments of an article
+    4   FTS5 full-text indexes ArticlesSearch (title, label, lead, content) and CommentsSearch (text), kept in sync by triggers
+    5   Articles split into ArticleInfo (identity, section, author, time, title, label, tag scores), ArticleMetrics (views,
+        comments, shares, hotness, refreshed) and ArticleTexts (lead, content, important), all keyed by article ID;
+        Articles is a view over the three tables with the columns of the former table, writable through triggers
+Run as a script to migrate a database and compare timing of typical queries (and of a refresh of metrics) before and after migration.
+"""
+
+import sqlite3
+from time import time as t
+
+def addColumns(connection):
+    """
+    Adds columns missing in Articles tables of older schemas (articleFromXLS, newArticles, articleUpdate).
+    :param connection: SQLite connection
+    """
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(Articles)")}
+    for column, kind in (("coauthors", "TEXT"),
+                         ("hour", "TEXT"),
+                         ("views", "INTEGER"),
+                         ("comments", "INTEGER"),
+                         ("shares", "INTEGER"),
+                         ("hotness", "REAL"),
+                         ("refreshed", "TEXT"),
+                         ("removed", "INTEGER DEFAULT 0")):
+        if column not in columns: connection.execute("ALTER TABLE Articles ADD COLUMN {} {}".format(column, kind))
+
+def addSearch(connection):
+    """
+    Creates FTS5 full-text indexes over Articles and Comments (external content, text is not stored twice) and triggers
+    keeping them in sync with inserts, updates and deletes of any script; existing rows are indexed.
+    Search with e.g. SELECT rowid FROM ArticlesSearch WHERE ArticlesSearch MATCH '"javni razpis" OR vlad*' (rowid is Articles.id).
+    :param connection: SQLite connection
+    :return: bool, False if SQLite is built without FTS5 (migration is tried again on next run)
+    """
+    try: connection.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.SearchCheck USING fts5(text)")
+    except sqlite3.OperationalError:
+        print("SQLite without FTS5, full-text index not created.")
+        return False
+    connection.execute("DROP TABLE temp.SearchCheck")
+    connection.executescript("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS ArticlesSearch USING fts5(title, label, lead, content, content='Articles', content_rowid='id');
+
+        CREATE TRIGGER IF NOT EXISTS Articles_search_insert AFTER INSERT ON Articles BEGIN
+            INSERT INTO ArticlesSearch (rowid, title, label, lead, content) VALUES (new.id, new.title, new.label, new.lead, new.content);
+        END;
+        CREATE TRIGGER IF NOT EXISTS Articles_search_delete AFTER DELETE ON Articles BEGIN
+            INSERT INTO ArticlesSearch (ArticlesSearch, rowid, title, label, lead, content) VALUES ('delete', old.id, old.title, old.label, old.lead, old.content);
+        END;
+        CREATE TRIGGER IF NOT EXISTS Articles_search_update AFTER UPDATE OF title, label, lead, content ON Articles BEGIN
+            INSERT INTO ArticlesSearch (ArticlesSearch, rowid, title, label, lead, content) VALUES ('delete', old.id, old.title, old.label, old.lead, old.content);
+            INSERT INTO ArticlesSearch (rowid, title, label, lead, content) VALUES (new.id, new.title, new.label, new.lead, new.content);
+        END;
+
+        CREATE VIRTUAL TABLE IF NOT EXISTS CommentsSearch USING fts5(text, content='Comments', content_rowid='id');
+
+        CREATE TRIGGER IF NOT EXISTS Comments_search_insert AFTER INSERT ON Comments BEGIN
+            INSERT INTO CommentsSearch (rowid, text) VALUES (new.id, new.text);
+        END;
+        CREATE TRIGGER IF NOT EXISTS Comments_search_delete AFTER DELETE ON Comments BEGIN
+            INSERT INTO CommentsSearch (CommentsSearch, rowid, text) VALUES ('delete', old.id, old.text);
+        END;
+        CREATE TRIGGER IF NOT EXISTS Comments_search_update AFTER UPDATE OF text ON Comments BEGIN
+            INSERT INTO CommentsSearch (CommentsSearch, rowid, text) VALUES ('delete', old.id, old.text);
+            INSERT INTO CommentsSearch (rowid, text) VALUES (new.id, new.text);
+        END;
+
+        INSERT INTO ArticlesSearch (ArticlesSearch) VALUES ('rebuild');
+        INSERT INTO CommentsSearch (CommentsSearch) VALUES ('rebuild')
+        """)
+    return True
+
+INFO_COLUMNS = ("idnum", "address", "section", "author", "coauthors", "time", "hour", "title", "label", "tags", "similarity", "relevance", "removed")
+TEXT_COLUMNS = ("lead", "content", "important")
+METRICS_COLUMNS = ("views", "comments", "shares", "hotness", "refreshed")
+
+def splitArticles(connection):
+    """
+    Splits Articles table into a narrow table of metrics, which are refreshed often and scanned whole by the analyzers, a table
+    of large texts, which are written once and read only when exported or searched, and a table of the remaining columns.
+    Refreshing metrics rewrites a short row instead of a row with the whole article text, and scans of metrics and of
+    the other columns do not read pages of texts. Articles is replaced by a view with the columns of the former table
+    in their order (SQLtoXLS reads columns by position); inserts, updates and deletes of the view are applied to the three
+    tables (and to ArticlesSearch) by triggers, so the scripts use Articles as before. IDs of articles are kept.
+    Metrics are joined in the view (a scan of metrics reads ArticleMetrics and the index of IDs of ArticleInfo); texts are
+    selected by subqueries, which SQLite evaluates only if a query uses them.
+    :param connection: SQLite connection
+    """
+    if connection.execute("SELECT type FROM sqlite_master WHERE name = 'Articles'").fetchone()[0] == "view": return
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(Articles)")]
+    view = list()
+    for column in columns:
+        if column in TEXT_COLUMNS: view.append("(SELECT {0} FROM ArticleTexts WHERE id_article = ArticleInfo.id) AS {0}".format(column))
+        elif column in METRICS_COLUMNS: view.append("ArticleMetrics.{0} AS {0}".format(column))
+        else: view.append("ArticleInfo.{0} AS {0}".format(column))
+    new = lambda names: ", ".join("new." + name for name in names)
+    assign = lambda names: ", ".join("{0} = new.{0}".format(name) for name in names)
+    connection.executescript("""
+        BEGIN;
+        CREATE TABLE ArticleInfo (
+        id          INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT UNIQUE,
+        idnum       INTEGER UNIQUE,
+        address     TEXT,
+        section     TEXT,
+        author      TEXT,
+        coauthors   TEXT,
+        time        TEXT,
+        hour        TEXT,
+        title       TEXT,
+        label       TEXT,
+        tags        INTEGER,
+        similarity  INTEGER,
+        relevance   REAL,
+        removed     INTEGER DEFAULT 0);
+
+        CREATE TABLE ArticleMetrics (
+        id_article  INTEGER NOT NULL PRIMARY KEY,
+        views       INTEGER,
+        comments    INTEGER,
+        shares      INTEGER,
+        hotness     REAL,
+        refreshed   TEXT);
+
+        CREATE TABLE ArticleTexts (
+        id_article  INTEGER NOT NULL PRIMARY KEY,
+        lead        TEXT,
+        content     TEXT,
+        important   TEXT);
+
+        INSERT INTO ArticleInfo (id, {info}) SELECT id, {info} FROM Articles ORDER BY id;
+        INSERT INTO ArticleMetrics (id_article, {metrics}) SELECT id, {metrics} FROM Articles ORDER BY id;
+        INSERT INTO ArticleTexts (id_article, {texts}) SELECT id, {texts} FROM Articles ORDER BY id;
+        DROP TABLE Articles;
+
+        CREATE INDEX ArticleInfo_time ON ArticleInfo (time);
+        CREATE INDEX ArticleInfo_section ON ArticleInfo (section);
+
+        CREATE VIEW Articles AS SELECT {view} FROM ArticleInfo JOIN ArticleMetrics ON ArticleMetrics.id_article = ArticleInfo.id;
+
+        CREATE TRIGGER Articles_insert INSTEAD OF INSERT ON Articles BEGIN
+            INSERT INTO ArticleInfo (id, {info}) VALUES (new.id, {new_info});
+            INSERT INTO ArticlesSearch (rowid, title, label, lead, content)
+                SELECT id, new.title, new.label, new.lead, new.content FROM ArticleInfo
+                WHERE idnum = new.idnum AND NOT EXISTS (SELECT 1 FROM ArticleTexts WHERE id_article = ArticleInfo.id);
+            INSERT INTO ArticleTexts (id_article, {texts}) SELECT id, {new_texts} FROM ArticleInfo WHERE idnum = new.idnum;
+            INSERT INTO ArticleMetrics (id_article, {metrics}) SELECT id, {new_metrics} FROM ArticleInfo WHERE idnum = new.idnum;
+        END;
+        CREATE TRIGGER Articles_delete INSTEAD OF DELETE ON Articles BEGIN
+            INSERT INTO ArticlesSearch (ArticlesSearch, rowid, title, label, lead, content) VALUES ('delete', old.id, old.title, old.label, old.lead, old.content);
+            DELETE FROM ArticleTexts WHERE id_article = old.id;
+            DELETE FROM ArticleMetrics WHERE id_article = old.id;
+            DELETE FROM ArticleInfo WHERE id = old.id;
+        END;
+        CREATE TRIGGER Articles_update_info INSTEAD OF UPDATE OF {info} ON Articles BEGIN
+            UPDATE ArticleInfo SET {assign_info} WHERE id = old.id;
+        END;
+        CREATE TRIGGER Articles_update_texts INSTEAD OF UPDATE OF {texts} ON Articles BEGIN
+            UPDATE ArticleTexts SET {assign_texts} WHERE id_article = old.id;
+        END;
+        CREATE TRIGGER Articles_update_metrics INSTEAD OF UPDATE OF {metrics} ON Articles BEGIN
+            UPDATE ArticleMetrics SET {assign_metrics} WHERE id_article = old.id;
+        END;
+        CREATE TRIGGER Articles_search_update INSTEAD OF UPDATE OF title, label, lead, content ON Articles BEGIN
+            INSERT INTO ArticlesSearch (ArticlesSearch, rowid, title, label, lead, content) VALUES ('delete', old.id, old.title, old.label, old.lead, old.content);
+            INSERT INTO ArticlesSearch (rowid, title, label, lead, content) VALUES (new.id, new.title, new.label, new.lead, new.content);
+        END;
+        COMMIT
+        """.format(info=", ".join(INFO_COLUMNS),
+                   texts=", ".join(TEXT_COLUMNS),
+                   metrics=", ".join(METRICS_COLUMNS),
+                   view=", ".join(view),
+                   new_info=new(INFO_COLUMNS[:-1]) + ", COALESCE(new.removed, 0)", # columns of a view have no defaults
+                   new_texts=new(TEXT_COLUMNS),
+                   new_metrics=new(METRICS_COLUMNS),
+                   assign_info=assign(INFO_COLUMNS),
+                   assign_texts=assign(TEXT_COLUMNS),
+                   assign_metrics=assign(METRICS_COLUMNS)))
+
+def dropArticles(connection):
+    """
+    Drops tables (or view) of articles, tags and relations with their full-text index and resets schema version,
+    e.g. for a database that is built anew on every run; migrate() creates them again.
+    :param connection: SQLite connection
+    """
+    for name, kind in connection.execute("""SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view')
+                                            AND name IN ('Articles', 'ArticleInfo', 'ArticleMetrics', 'ArticleTexts', 'ArticlesSearch', 'Tags', 'Relations')""").fetchall():
+        connection.execute("DROP {} {}".format(kind.upper(), name))
+    connection.execute("PRAGMA user_version = 0")
+    connection.commit()
+
+# (version, description, SQL script or function taking connection and returning False if migration cannot be applied)
+MIGRATIONS = [(1, "tables", """
+                  CREATE TABLE IF NOT EXISTS Articles (
+                  id          INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT UNIQUE,
+                  idnum       INTEGER UNIQUE,
+                  address     TEXT,
+                  section     TEXT,
+                  author      TEXT,
+                  coauthors   TEXT,
+                  time        TEXT,
+                  hour        TEXT,
+                  title       TEXT,
+                  label       TEXT,
+                  lead        TEXT,
+                  content     TEXT,
+                  important   TEXT,
+                  tags        INTEGER,
+                  similarity  INTEGER,
+                  relevance   REAL,
+                  views       INTEGER,
+                  comments    INTEGER,
+                  shares      INTEGER,
+                  hotness     REAL,
+                  refreshed   TEXT);
+
+                  CREATE TABLE IF NOT EXISTS Tags (
+                  id          INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT UNIQUE,
+                  tag         TEXT UNIQUE);
+
+                  CREATE TABLE IF NOT EXISTS Relations (
+                  id_article  INTEGER,
+                  id_tag      INTEGER,
+                  PRIMARY KEY (id_article, id_tag));
+
+                  CREATE TABLE IF NOT EXISTS Comments (
+                  id          INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT UNIQUE,
+                  id_article  INTEGER,
+                  address     TEXT,
+                  user        TEXT,
+                  text        TEXT,
+                  date        TEXT,
+                  time        TEXT,
+                  up          INTEGER,
+                  down        INTEGER,
+                  reply_to    TEXT,
+                  hash_value  TEXT UNIQUE);
+
+                  CREATE TABLE IF NOT EXISTS CommentState (
+                  id_article  INTEGER NOT NULL PRIMARY KEY,
+                  comments    INTEGER,
+                  pages       INTEGER,
+                  newest_hash TEXT)
+                  """),
+              (2, "columns", addColumns),
+              (3, "indexes", """
+                  CREATE INDEX IF NOT EXISTS Articles_time ON Articles (time);
+                  CREATE INDEX IF NOT EXISTS Articles_section ON Articles (section);
+                  CREATE INDEX IF NOT EXISTS Relations_id_tag ON Relations (id_tag);
+                  CREATE INDEX IF NOT EXISTS Comments_id_article ON Comments (id_article)
+                  """),
+              (4, "full-text search", addSearch),
+              (5, "metrics and texts of articles in separate tables", splitArticles)]
+
+def getVersion(connection): return connection.execute("PRAGMA user_version").fetchone()[0]
+
+def getMetricsUpdate(connection):
+    """
+    :param connection: SQLite connection
+    :return: str, statement refreshing metrics of an article (views, shares, comments, hotness, refreshed, idnum parameters);
+    from version 5 on, ArticleMetrics table is updated directly, so that number of updated rows is reported by the cursor
+    """
+    if getVersion(connection) >= 5: return """UPDATE ArticleMetrics SET views = ?, shares = ?, comments = ?, hotness = ?, refreshed = ?
+                                               WHERE id_article = (SELECT id FROM ArticleInfo WHERE idnum = ?)"""
+    return "UPDATE Articles SET views = ?, shares = ?, comments = ?, hotness = ?, refreshed = ? WHERE idnum = ?"
+
+def migrate(connection):
+    """
+    Brings database to the latest schema version.
+    :param connection: SQLite connection
+    :return: list, descriptions of applied migrations
+    """
+    applied = list()
+    for version, description, migration in MIGRATIONS:
+        if version <= getVersion(connection): continue
+        if isinstance(migration, str): connection.executescript(migration)
+        elif migration(connection) is False: break
+        connection.execute("PRAGMA user_version = {}".format(version))
+        connection.commit()
+        applied.append("{}: {}".format(version, description))
+    return applied
+
+def timeQueries(connection, rounds=20):
+    """
+    Times typical queries of the scripts (SQLtoXLS, wordFrequencyAnalyzer, writers).
+    :param connection: SQLite connection
+    :param rounds: int, number of times every query is run
+    :return: list, (name of query, average ms or None if query cannot run on this schema, query plan) tuples
+    """
+    cursor = connection.cursor()
+    try:
+        end, begin = cursor.execute("SELECT MAX(time), date(MAX(time), '-30 days') FROM Articles").fetchone()
+        section = (cursor.execute("SELECT section FROM Articles ORDER BY id DESC LIMIT 1").fetchone() or [""])[0]
+        id_article = (cursor.execute("SELECT MAX(id_article) FROM Relations").fetchone() or [0])[0]
+        id_tag = (cursor.execute("SELECT id_tag FROM Relations GROUP BY id_tag ORDER BY COUNT(*) DESC LIMIT 1").fetchone() or [0])[0]
+    except sqlite3.OperationalError: return list()
+    queries = [("articles of last 30 days", "SELECT title, label, lead, content FROM Articles WHERE time BETWEEN ? AND ?", (begin, end)),
+               ("export of last 30 days with tags", """SELECT * FROM Articles
+                                                       LEFT OUTER JOIN Relations ON Articles.id = Relations.id_article
+                                                       LEFT OUTER JOIN Tags ON Relations.id_tag = Tags.id
+                                                       WHERE (Articles.time BETWEEN ? AND ?)
+                                                       ORDER BY Articles.time DESC""", (begin, end)),
+               ("articles of section", "SELECT idnum FROM Articles WHERE section = ?", (section,)),
+               ("articles of most used tag", "SELECT id_article FROM Relations WHERE id_tag = ?", (id_tag,)),
+               ("comments of article", "SELECT text FROM Comments WHERE id_article = ?", (id_article,)),
+               ("articles containing word (LIKE)", "SELECT id FROM Articles WHERE content LIKE ?", ("%vlada%",)),
+               ("articles containing word (full-text search)", "SELECT rowid FROM ArticlesSearch WHERE ArticlesSearch MATCH ?", ("content: vlada",)),
+               ("articles containing phrase or prefix (full-text search)", "SELECT rowid FROM ArticlesSearch WHERE ArticlesSearch MATCH ?", ('"javni razpis" OR vlad*',)),
+               ("metrics of all articles", "SELECT SUM(views), SUM(shares), AVG(hotness) FROM Articles", ()),
+               ("metrics of last 30 days", "SELECT idnum, views, shares, comments, hotness FROM Articles WHERE time BETWEEN ? AND ?", (begin, end))]
+    timings = list()
+    for name, query, parameters in queries:
+        try:
+            plan = "; ".join(row[-1] for row in cursor.execute("EXPLAIN QUERY PLAN " + query, parameters))
+            start = t()
+            for i in range(rounds): cursor.execute(query, parameters).fetchall()
+            timings.append((name, (t() - start) * 1000 / rounds, plan))
+        except sqlite3.OperationalError as e: timings.append((name, None, str(e)))
+    return timings
+
+def timeRefresh(connection, articles=1000, rounds=5):
+    """
+    Times a refresh of metrics of latest articles as done by metricsUpdate (one update per article, one commit);
+    articles are refreshed with their current metrics, so data is not changed.
+    :param connection: SQLite connection
+    :param articles: int, number of refreshed articles
+    :param rounds: int, number of times refresh is run
+    :return: tuple, name, average ms or None if refresh cannot run on this schema, statement
+    """
+    name = "refresh metrics of {} articles".format(articles)
+    query = getMetricsUpdate(connection)
+    try:
+        rows = connection.execute("SELECT views, shares, comments, hotness, refreshed, idnum FROM Articles ORDER BY id DESC LIMIT ?", (articles,)).fetchall()
+        start = t()
+        for i in range(rounds):
+            for row in rows: connection.execute(query, row)
+            connection.commit()
+    except sqlite3.OperationalError as e: return (name, None, str(e))
+    return (name, (t() - start) * 1000 / rounds, " ".join(query.split()))
+
+if __name__ == "__main__":
+    database = input("Enter database name (default articles.sqlite): ") or "articles.sqlite"
+    connection = sqlite3.connect(database)
+    print("Schema version: {}".format(getVersion(connection)))
+    before = timeQueries(connection) + [timeRefresh(connection)]
+    applied = migrate(connection)
+    print("Applied migrations: " + (", ".join(applied) if applied else "none, database is up to date."))
+    after = timeQueries(connection) + [timeRefresh(connection)]
+    print("Schema version: {}".format(getVersion(connection)))
+    for (name, old, old_plan), (name, new, new_plan) in zip(before, after):
+        print(name)
+        print("    before: {} ({})".format("n/a" if old is None else "{:.2f} ms".format(old), old_plan))
+        print("    after:  {} ({})".format("n/a" if new is None else "{:.2f} ms".format(new), new_plan))
+        if old and new: print("    speedup: {:.1f}x".format(old / new))
+    connection.close()
@@ -0,0 +1,158 @@
+"""
+Module for extracting a few fields from article pages without downloading and parsing whole pages. See details in method specification below.
+Page is read in chunks and fed to an incremental tokenizer (html.parser); reading stops and the connection is closed
+as soon as all declared fields are found (or a marker element after which they cannot appear is reached).
+Declared field sets:
+    AUTHOR_FIELDS   authors of article (promo box, author names), for dailyArticles
+    METRIC_FIELDS   views, shares, number of comments, hotness, for metricsUpdate
+"""
+
+import re
+import threading
+from html.parser import HTMLParser
+from time import time as t
+from httpClient import client
+
+class Field(object):
+    """
+    Field object for declaring an element to extract text from.
+    """
+    def __init__(self, name, tag, css_class, child=None, multiple=False):
+        """
+        :param name: str, name of field
+        :param tag: str, tag name of element
+        :param css_class: str, class of element
+        :param child: str, tag name of first child element to take text from instead of whole element, None for whole element
+        :param multiple: bool, True if text of all matching elements is extracted, False if only of first one
+        """
+        self.name = name
+        self.tag = tag
+        self.css_class = css_class
+        self.child = child
+        self.multiple = multiple
+    def getName(self): return self.name
+    def matches(self, tag, classes): return tag == self.tag and self.css_class in classes
+
+AUTHOR_FIELDS = [Field("promo", "div", "article__promo", child="span"),
+                 Field("author_name", "h3", "article__author_name", multiple=True),
+                 Field("authors_name", "h3", "article__authors_name", multiple=True)]
+AUTHOR_UNTIL = [("div", "article__content")] # authors are listed before content of article
+METRIC_FIELDS = [Field("views", "div", "article__views"),
+                 Field("shares", "span", "article__total_shares"),
+                 Field("comments", "span", "comments__post_count"),
+                 Field("hotness", "div", "article__hotness", child="span")]
+
+class StreamExtractor(HTMLParser):
+    """
+    StreamExtractor object for extracting text of declared fields from HTML fed in chunks.
+    """
+    def __init__(self, fields, until=()):
+        """
+        :param fields: list, Field objects
+        :param until: list, (tag name, class) tuples of elements after which no declared field appears
+        """
+        HTMLParser.__init__(self)
+        self.fields = fields
+        self.until = until
+        self.values = {field.getName(): list() for field in fields}
+        self.captures = list() # [field, tag, depth, text, waiting for child] of elements being read
+        self.stopped = False
+    def isDone(self):
+        """
+        :return: bool, True if all declared fields are found or a marker element was reached
+        """
+        if self.stopped: return True
+        return not self.captures and all(self.values[field.getName()] for field in self.fields if not field.multiple)
+    def handle_starttag(self, tag, attrs):
+        classes = (dict(attrs).get("class") or "").split()
+        if any(tag == name and css_class in classes for name, css_class in self.until): self.stopped = True
+        for capture in self.captures:
+            if capture[4] and tag == capture[0].child: # first child element of field found, its text is taken
+                capture[1], capture[2], capture[4] = tag, 0, False
+            if tag == capture[1]: capture[2] += 1
+        for field in self.fields:
+            if field.matches(tag, classes) and (field.multiple or not self.values[field.getName()]) and not any(capture[0] is field for capture in self.captures):
+                self.captures.append([field, tag, 1, "", field.child is not None])
+    def handle_endtag(self, tag):
+        for capture in list(self.captures):
+            if tag != capture[1]: continue
+            capture[2] -= 1
+            if capture[2] == 0:
+                self.captures.remove(capture)
+                if not capture[4]: self.values[capture[0].getName()].append(capture[3].strip())
+    def handle_data(self, data):
+        for capture in self.captures:
+            if not capture[4]: capture[3] += data
+
+class StreamStats(object):
+    """
+    StreamStats object for summarizing streamed pages.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pages = 0
+        self.early = 0 # pages closed before end
+        self.seconds = 0.0
+    def count(self, elapsed, early):
+        with self.lock:
+            self.pages += 1
+            self.early += early
+            self.seconds += elapsed
+    def report(self):
+        """
+        :return: str, number of streamed pages, pages closed early, average time per page and bytes not downloaded
+        """
+        with self.lock:
+            average = self.seconds / self.pages * 1000 if self.pages else 0.0
+            return "Streaming: {} pages ({} closed early), {:.0f} ms per page, {:.1f} KB not downloaded.".format(self.pages, self.early, average, client.saved / 1024)
+
+stats = StreamStats()
+
+def extractFields(url, fields, until=(), chunk_size=16384):
+    """
+    Fetches page in chunks until all declared fields are extracted, then closes the connection.
+    :param url: str, page URL
+    :param fields: list, Field objects
+    :param until: list, (tag name, class) tuples of elements after which no declared field appears
+    :param chunk_size: int, number of bytes read at a time
+    :return: dict, name of field -> list of texts of matching elements (empty if not found)
+    """
+    start = t()
+    extractor = StreamExtractor(fields, until)
+    chunks = client.stream(url, chunk_size)
+    early = False
+    try:
+        for chunk in chunks:
+            extractor.feed(chunk)
+            if extractor.isDone():
+                early = True
+                break
+        extractor.close()
+    finally: chunks.close()
+    stats.count(t() - start, early)
+    return extractor.values
+
+def getAuthors(url):
+    """
+    Extracts authors of article.
+    :param url: str, article URL
+    :return: list, authors (promo box first), [""] if none
+    """
+    values = extractFields(url, AUTHOR_FIELDS, AUTHOR_UNTIL)
+    authors = values["author_name"] + values["authors_name"]
+    if values["promo"]: authors.insert(0, values["promo"][0])
+    return authors or [""]
+
+def getMetrics(url):
+    """
+    Extracts metrics of article.
+    :param url: str, article URL
+    :return: tuple (views, shares, number of comments, hotness), 0 if not found
+    """
+    values = extractFields(url, METRIC_FIELDS)
+    def number(name):
+        try: return int(re.findall(r"\d+", values[name][0])[0])
+        except IndexError: return 0
+    try: hotness = float(values["hotness"][0].replace(",", "."))
+    except (IndexError, ValueError): hotness = 0.0
+    return number("views"), number("shares"), number("comments"), hotness
@@ -0,0 +1,69 @@
+"""
+Module for resolving tags to IDs of Tags table in memory. See details in method specification below.
+Tags table is read into a dictionary (tag -> ID) once per cursor, on first use; IDs of known tags are resolved without
+querying the database, new tags of an article are inserted with one executemany and read back with one query, and
+relations of article and its tags are written with one executemany.
+The dictionary assumes that only its cursor adds tags to the database while it is used (one writer per database).
+"""
+
+import weakref
+
+dictionaries = weakref.WeakKeyDictionary() # cursor -> TagDictionary
+
+class TagDictionary(object):
+    """
+    TagDictionary object for resolving and creating tag IDs of a database.
+    """
+    def __init__(self):
+        self.ids = None # tag -> ID, read on first use
+        self.lookups = 0
+        self.hits = 0
+        self.created = 0
+    def load(self, cursor):
+        """
+        Reads Tags table; if a tag is in the table more than once, its first ID is used.
+        :param cursor: SQLite cursor
+        """
+        self.ids = dict()
+        for id_tag, tag in cursor.execute("SELECT id, tag FROM Tags ORDER BY id"): self.ids.setdefault(tag, id_tag)
+    def getIds(self, cursor, tags):
+        """
+        Resolves tags to IDs, new tags are inserted into Tags table.
+        :param cursor: SQLite cursor
+        :param tags: list, tags
+        :return: list, IDs of tags in order of tags
+        """
+        if self.ids is None: self.load(cursor)
+        unique = list(dict.fromkeys(tags)) # repeated tags of an article are counted once
+        self.lookups += len(unique)
+        self.hits += sum(tag in self.ids for tag in unique)
+        new = [tag for tag in unique if tag not in self.ids]
+        if new:
+            cursor.executemany("INSERT OR IGNORE INTO Tags (tag) VALUES (?)", [(tag,) for tag in new])
+            cursor.execute("SELECT id, tag FROM Tags WHERE tag IN ({}) ORDER BY id".format(", ".join("?" * len(new))), new)
+            for id_tag, tag in cursor.fetchall(): self.ids.setdefault(tag, id_tag)
+            self.created += len(new)
+        return [self.ids[tag] for tag in tags]
+    def getHitRate(self): return self.hits / self.lookups if self.lookups else 0.0
+    def report(self):
+        """
+        :return: str, number of looked up tags, share of tags resolved from dictionary and number of new tags
+        """
+        return "Tags: {} lookups, {:.1f} % resolved from dictionary, {} new tags, {} tags in dictionary.".format(self.lookups, self.getHitRate() * 100, self.created, len(self.ids or ()))
+
+def getDictionary(cursor):
+    """
+    :param cursor: SQLite cursor
+    :return: TagDictionary object of cursor, created on first call
+    """
+    if cursor not in dictionaries: dictionaries[cursor] = TagDictionary()
+    return dictionaries[cursor]
+
+def writeRelations(cursor, id_article, tags):
+    """
+    Writes tags of article to Tags table (if new) and relations of article and tags to Relations table.
+    :param cursor: SQLite cursor
+    :param id_article: int, ID of article in database
+    :param tags: list, tags of article
+    """
+    cursor.executemany("INSERT OR REPLACE INTO Relations (id_article, id_tag) VALUES (?, ?)", [(id_article, id_tag) for id_tag in getDictionary(cursor).getIds(cursor, tags)])
@@ -4,270 +4,159 @@ Takes URLs of articles to update in a form of a .txt file as an input.
 Fetches data from websites of given article URLs.
 !!! Modifies data from articles in articles.sqlite database by overwriting any existing data. !!!
 !!! Articles must exist in database in order to be updated. !!!
-Dependencies: modules tagRelevance, tagSimilarity
+Articles are fetched concurrently, parsed and scored in worker processes and written by a single writer thread (see module articlePipeline).
+Articles can also be reparsed from archived pages (see module htmlArchive) instead of fetched, e.g. after a change of the parser;
+no requests are made then and the run doubles as a benchmark of parsing throughput. Metrics (views, comments, shares, hotness)
+of archived pages are out of date, so metrics and date of refresh of reparsed articles are kept (see module metricsUpdate).
+Dependencies: modules articleParser, articlePipeline, tagRelevance, tagSimilarity
 """
 
-import urllib.request
-from bs4 import BeautifulSoup as bs
+import urllib.error
 import re
 import sqlite3
-from datetime import date
 from time import time as t
-from hashlib import md5
-from tagSimilarity import tagSimilarity
-from tagRelevance import tagRelevance
+from articleParser import commentRows, timingReport
+from articlePipeline import ExtractionError, ParserPool, Writer
+from tagDictionary import writeRelations
+from deadLetters import DeadLetters
+from htmlArchive import HTMLArchive
+from parserBackend import chooseBackend, getBackend
+from concurrentFetch import fetchOrdered
+from httpClient import client
+from adaptiveConcurrency import AdaptiveConcurrency
+from retryPolicy import isNotFound
+from responseCache import ResponseCache
+from schema import migrate
 
-# classes
-class Article(object):
+def openArticle(address):
     """
-    Article object for storing article data.
+    Opens article. Transient errors are retried by client (see module retryPolicy).
+    :param address: str, article URL
+    :return: str, HTML of article or None if article does not exist
+    """
+    try: return client.fetch(address)
+    except urllib.error.HTTPError as e:
+        if isNotFound(e): return None
+        raise
+
+def articleAddresses(file_name):
     """
-    def __init__(self, idnum, address, section, author, coauthors, date, time, title, label, lead, content, important, tags, tag_number, similarity, relevance, views, shares, comments, hotness, refreshed):
-        self.idnum = idnum
-        self.address = address
-        self.section = section
-        self.author = author
-        self.coauthors = coauthors
-        self.date = date
-        self.time = time
-        self.title = title
-        self.label = label
-        self.lead = lead
-        self.content = content
-        self.important = important
-        self.tags = tags
-        self.tag_number = tag_number
-        self.similarity = similarity
-        self.relevance = relevance
-        self.views = views
-        self.shares = shares
-        self.comments = comments
-        self.hotness = hotness
-        self.refreshed = refreshed
-    def getIdnum(self): return self.idnum
-    def getAddress(self): return self.address
-    def getSection(self): return self.section
-    def getAuthor(self): return self.author
-    def getCoauthors(self): return self.coauthors
-    def getDate(self): return self.date
-    def getTime(self): return self.time
-    def getTitle(self): return self.title
-    def getLabel(self): return self.label
-    def getLead(self): return self.lead
-    def getContent(self): return self.content
-    def getImportant(self): return self.important
-    def getTags(self): return self.tags
-    def getTagNumber(self): return self.tag_number
-    def getSimilarity(self): return self.similarity
-    def getRelevance(self): return self.relevance
-    def getViews(self): return self.views
-    def getShares(self): return self.shares
-    def getComments(self): return self.comments
-    def getHotness(self): return self.hotness
-    def getRefreshed(self): return self.refreshed
+    Reads article URLs from a .txt file.
+    :param file_name: str, name of .txt file with URLs
+    :return: generator of article URLs
+    """
+    for line in open(file_name).readlines():
+        if "http://" in line or "https://" in line:
+            ### modify all addresses from Gospodarstvo section to Posel danes section ###
+            if "/gospodarstvo/" in line: line = line.replace("/novice/gospodarstvo/", "/posel-danes/novice/")
+            ### end of modify ###
+            yield line.rstrip()
 
-class Comment(object):
+def archivedArticles(archive, file_name):
     """
-    Comment object for storing comment data.
+    Reads article pages from archive.
+    :param archive: HTMLArchive object
+    :param file_name: str, name of .txt file with URLs, empty for all archived articles
+    :return: generator of (URL, HTML, error) tuples; error is LookupError if article is not in archive
     """
-    def __init__(self, address, user, text, date, time, up, down, reply_to=None):
-        self.address = address
-        self.user = user
-        self.text = text
-        self.date = date
-        self.time = time
-        self.up = up
-        self.down = down
-        self.reply_to = reply_to
-        self.hash_value = md5(bytes(user + text + date + time, encoding="UTF-8")).hexdigest() # attempts to create a unique value for comment based on its user, text, date and time
-    def getAddress(self): return self.address
-    def getUser(self): return self.user
-    def getText(self): return self.text
-    def getDate(self): return self.date
-    def getTime(self): return self.time
-    def getUp(self): return self.up
-    def getDown(self): return self.down
-    def setReplyTo(self, reply_to_comment): self.reply_to = reply_to_comment
-    def getReplyTo(self): return self.reply_to
-    def getHashValue(self): return self.hash_value
+    if not file_name:
+        for idnum, address, html, fetched in archive.articles(): yield address, html, None
+        return
+    for address in articleAddresses(file_name):
+        archived = archive.lookup(int(re.findall("\d+$", address)[0]))
+        if archived: yield address, archived[1], None
+        else: yield address, None, LookupError("article not in archive")
 
-# functions
-def getArticle(address, content, Article):
+def getAllComments(parsers, address, page_comments, comments_url, workers, first_page=2):
     """
-    Gets article data from parsed HTML string and creates am Article object.
+    Gets comments from article page and pages of dedicated comments website.
+    First page of dedicated comments website is always fetched, further pages from first_page on.
+    Further pages are fetched concurrently once the number of pages is known, parsed in worker processes and merged in page order.
+    :param parsers: ParserPool object
     :param address: str, article URL
-    :param content: BS4 soup object
-    :param Article: Article class
-    :return: Article object
+    :param page_comments: list, Comment objects from article page
+    :param comments_url: str, URL of dedicated comments website
+    :param workers: int, number of concurrent fetchers
+    :param first_page: int, first of further pages to fetch (>= 2)
+    :return: tuple (list of Comment objects, number of pages of dedicated comments website or None if a page could not be opened, number of fetched pages)
     """
-    # article ID
-    id = int(re.findall("\d+$", address)[0])
-    # section of article
-    try: section = re.findall("\.net/(.+)/", address)[0]
-    except IndexError: section = ""
-    # parsed article content
-    soup = content
-    # author(s) of article
-    authors = list()
-    authors.extend([author[:-1] if author[-1] == "," else author for author in re.findall("/\">(.+)", str(soup.find_all("span", class_="article__author")))])
-    try: authors.insert(0, re.findall("<span>(.*?)</span>", str(soup.find_all("div", class_="article__pr_box")))[0])
-    except IndexError: pass
-    if not authors: authors = [""]
-    if len(authors) > 1: coauthors = ", ".join(authors[1:])
-    else: coauthors = ""
-    authors = authors[0]
-    # publication date of artice
-    time = "-".join(reversed([datum if len(datum) > 1 else "0" + datum for datum in re.findall("(\d+)", soup.find("span", class_="article__publish_date--date").getText())]))
-    # publication hour of article
-    hour = ":".join([datum if len(datum) > 1 else "0" + datum for datum in re.findall("(\d+)", soup.find("span", class_="article__publish_date--time").getText())]) + ":00"
-    # article title
-    title = re.findall(">(.*)<", str(soup("h1")[0]))[0]
-    # article label
-    try: label = soup.find("span", class_="article__overtitle").getText()
-    except AttributeError: label = ""
-    # article lead, text only, no urls
-    try: lead = re.sub("<.+?>", "", re.sub(r"\n\s{2,}", "", soup.find("div", class_="article__intro js_articleIntro").getText()))
-    except IndexError: lead = ""
-    # main article content, text and headlines only, no urls, iframes
-    try: content_lines = soup.find("div", class_="article__main js_article js_bannerInArticleWrap").find_all("p")
-    except RuntimeError: content_lines = []
-    content = str()
-    pattern = re.compile("<.+?>")
-    for line in content_lines:
-        if "<div" not in line and "</div>" not in line and "<a href" not in line and "iframe" not in line: content += re.sub(pattern, "", line.getText()) + "\n"
-    content = re.sub(r"\n{2,}", "\n", content) # replaces multiple \n with single \n
-    # important text (text in italic or bold)
-    important_set = set()
-    pattern = re.compile("<[se][tm]\w*>(.+?)</") # finds <strong> and <em> tags
-    for line in content_lines:
-        if "<div" not in line and "</div>" not in line and "<a href" not in line and "iframe" not in line:
-            for item in re.findall(pattern, str(line)): important_set.add(item.replace("\xa0", " "))
-    important = ", ".join(important_set)
-    # entire article
-    all = title + "\n\n" + label + "\n\n" + lead + "\n\n" + content
-    # article tags
-    tags = [tag.getText() for tag in soup.find_all("a", class_="article__tags--tag")]
-    # number of tags
-    tag_number = len(tags)
-    # tag similarity index
-    similarity = tagSimilarity(tags)
-    # tag relevance index
-    relevance = tagRelevance(tags, important, all)
-    # article views
-    try: pageviews = int(re.findall(r"\d+", str(soup("div", class_="article__views")))[0])
-    except IndexError:
-        try: pageviews = int(re.findall(r"\d+", re.findall(r"article__views.+<\/div>", str(soup))[0])[0])
-        except IndexError: pageviews = 0
-    # article shares
-    try: shares = int(re.findall(r"\d+", str(soup("span", class_="article__total_shares")))[0])
-    except IndexError: shares = 0
-    # article comments number
-    try: comments_number = int(re.findall(r"\d+", str(soup("span", class_="comments__post_count")))[0])
-    except IndexError: comments_number = 0
-    # article hotness
-    try: hotness = float(soup.find("div", class_="article__hotness").find("span").getText().replace(",", "."))
-    except (IndexError, AttributeError) as e: hotness = 0.0
-    # refresh time of article data in database (last data update)
-    refreshed = str(date.today())
-    return Article(id, address, section, authors, coauthors, time, hour, title, label, lead, content, important, tags, tag_number, similarity, relevance, pageviews, shares, comments_number, hotness, refreshed)
+    comments, pages, fetched = parsers.comments(address, comments_url, workers, first_page) # dedicated page(s) also contain 3 comments from article page that are NOT duplicated in database
+    return page_comments + comments, pages, fetched
 
-def getComments(address, content, level, Comment):
+def commentTime(comment):
+    """
+    :param comment: Comment object
+    :return: tuple, numbers of date and time of comment, for comparing comments by time
     """
-    Gets comments data from parsed HTML string and creates a Comment object.
+    return tuple(int(number) for number in re.findall(r"\d+", comment.getDate() + " " + comment.getTime()))
+
+def isComplete(comments, newest, added):
+    """
+    Checks that pages fetched incrementally (first page and pages from last page seen at previous update on) contain all new comments.
+    Pages of dedicated comments website are expected to list threads oldest first, with replies under their thread, so that
+    new threads are on the last pages. This is checked on fetched pages; if threads are listed newest first (comments move
+    across all pages) or new comments are missing (e.g. replies to threads on skipped pages), all pages have to be fetched.
+    :param comments: list, Comment objects from fetched pages of dedicated comments website, in page order
+    :param newest: str, hash value of newest comment seen at previous update
+    :param added: int, number of comments added since previous update
+    :return: bool, True if threads are listed oldest first and at least added comments are newer than newest comment of previous update
+    """
+    threads = [commentTime(comment) for comment in comments if comment.getReplyTo() is None]
+    if threads != sorted(threads): return False # not oldest first
+    previous = [comment for comment in comments if comment.getHashValue() == newest]
+    if not previous: return False
+    return sum(commentTime(comment) >= commentTime(previous[0]) for comment in comments) - 1 >= added
+
+def getNewComments(parsers, address, page_comments, comments_url, workers, comments_number, state):
+    """
+    Gets comments of article incrementally, based on comments crawl state stored at previous update.
+    Skips fetching if number of comments is unchanged, otherwise fetches only pages from the last page seen at previous update on.
+    Fetches all pages if fetched pages do not account for all new comments (see isComplete()).
+    :param parsers: ParserPool object
     :param address: str, article URL
-    :param content: BS4 element tag
-    :param level: bool, True if comments on article page, False if separate page comments
-    :param Comment: Comment class
-    :return: list, Comment objects
+    :param page_comments: list, Comment objects from article page
+    :param comments_url: str, URL of dedicated comments website
+    :param workers: int, number of concurrent fetchers
+    :param comments_number: int, current number of comments of article
+    :param state: tuple (number of comments, number of pages, hash value of newest comment) from CommentState table or None
+    :return: tuple (list of Comment objects, number of pages of dedicated comments website or None if skipped, number of fetched pages, 0 if skipped)
     """
-    comments = list()
-    if level: comments_data = content.find_all("span", class_="comments__inner comments__inner--toplevel cf js_oneComment")
-    else: comments_data = content.find_all("div", class_="comments__inner comments__inner--toplevel js_oneComment")
-    for comment_data in comments_data:
-        first_comment = None
-        for i in range(len(comment_data.find_all("span", class_="comments__username"))):
-            user = comment_data.find_all("span", class_="comments__username")[i].getText()
-            text = comment_data.find_all("p", class_="comments__text")[i].getText()
-            date_time = comment_data.find_all("span", class_="comments__timestamp")[i].getText()
-            date = "-".join(re.findall(r"\d+(?=\.)", date_time)[::-1])
-            time = re.findall(r"(?<=ob\s).+", date_time)[0] + ":00"
-            try:
-                votes = comment_data.find_all("span", class_="vote_count")
-                up = int(votes[i*2].getText())
-                down = int(votes[i*2+1].getText())
-            except IndexError:
-                up = None
-                down = None
-            comment_object = Comment(address, user, text, date, time, up, down)
-            if i == 0:
-                first_comment = comment_object.getHashValue()
-                comments.append(comment_object)
-            else:
-                comment_object.setReplyTo(first_comment)
-                comments.append(comment_object)
-    return comments
+    if state and state[0] == comments_number: return [], None, 0 # no new comments
+    if not state or not state[1]: return getAllComments(parsers, address, page_comments, comments_url, workers)
+    comments, pages, fetched = getAllComments(parsers, address, page_comments, comments_url, workers, state[1])
+    if not isComplete(comments[len(page_comments):], state[2], comments_number - state[0]):
+        comments, pages, more = getAllComments(parsers, address, page_comments, comments_url, workers)
+        fetched += more
+    return comments, pages, fetched
 
-start = t()
-"""
-SQL table schema.
-"""
-connection = sqlite3.connect("articles - Copy.sqlite")
-cursor = connection.cursor()
-"""
-Parsing of articles from URLs.
-"""
-for line in open(input("Enter file name: ")).readlines():
-    if "http://" in line or "https://" in line:
-        ### modify all addresses from Gospodarstvo section to Posel danes section ###
-        if "/gospodarstvo/" in line: line = line.replace("/novice/gospodarstvo/", "/posel-danes/novice/")
-        ### end of modify ###
-        tries = 0
-        while True: # trying to open article 5 times before removing it from database
-            try:
-                html = urllib.request.urlopen(line.rstrip()).read().decode("UTF-8")
-                tries = 0
-                break
-            except urllib.error.HTTPError:
-                tries += 1
-                print("Failed to open article {} {} times.".format(line.rstrip(), tries))
-            if tries == 5: break
-        if tries: # marks article as removed in database
-            print("Article not found: " + line.rstrip() + " Marking as removed in database.")
-            cursor.execute("UPDATE Articles SET removed = 1")
-            connection.commit()
-            continue
-        soup = bs(html, "html5lib") # html5lib OR lxml
-        # address (url) of article
-        address = line.rstrip()
-        print(address)
-        # article
-        article = getArticle(address, soup, Article)
-        # article comments
-        if not soup.find_all("div", class_="comments__show_all"):
-            comments_soup = soup.find("ul", class_="comments__list cf")
-            if comments_soup: comments = getComments(address, comments_soup, True, Comment)
-            else: comments = []
-        else:
-            comments = getComments(address, soup.find("ul", class_="comments__list cf"), True, Comment) # gets 3 comments from article page, which contain votes
-            comments_urls = ["https://siol.net" + soup.find_all("a", class_="comments__show_all--button")[0].get("href")]
-            comments_html = urllib.request.urlopen(comments_urls[0]).read().decode("UTF-8")
-            comments_soup = bs(comments_html, "html5lib")
-            if comments_soup:
-                multiple_urls = comments_soup.find_all("li", class_="pagination__item") # looks for possible URLs from multiple comments pages listed on a dedicated comments page
-                if multiple_urls:
-                    pages = 0
-                    for url in reversed(multiple_urls):
-                        page = url.find("a").getText()
-                        if page:
-                            pages = int(page)
-                            break
-                    for i in range(2, pages + 1): comments_urls.append(comments_urls[0] + "?page=" + str(i))
-                for url in comments_urls:
-                    url_html = urllib.request.urlopen(url).read().decode("UTF-8")
-                    url_soup = bs(url_html, "html5lib")
-                    comms = getComments(address, url_soup.find("ul", class_="comments__list cf "), False, Comment)
-                    comments.extend(comms) # gets comments from dedicated page(s) (which also contain 3 comments from article page that are NOT duplicated in database)
-        # database builder
+def writeArticle(cursor, item):
+    """
+    Writes item to database (runs in writer thread).
+    :param cursor: SQLite cursor
+    :param item: tuple ("removed", article ID) for removed article or ("article", Article object, list of Comment objects, number of pages of dedicated comments website or None);
+    kind "reparsed" instead of "article" for article reparsed from archive, whose metrics and comments crawl state are not written
+    """
+    if item[0] == "removed": # marks article as removed in database
+        cursor.execute("UPDATE Articles SET removed = 1 WHERE idnum = ?", (item[1],))
+        return
+    kind, article, comments, pages = item
+    if kind == "reparsed": # metrics of archived page are out of date, current metrics and date of refresh are kept
+        cursor.execute("""UPDATE Articles SET address = ?,
+                                              section = ?,
+                                              author = ?,
+                                              coauthors = ?,
+                                              time = ?,
+                                              hour = ?,
+                                              title = ?,
+                                              label = ?,
+                                              lead = ?,
+                                              content = ?,
+                                              important = ?,
+                                              tags = ?,
+                                              similarity = ?,
+                                              relevance = ?
+                                              WHERE idnum = ?""", article.getReparseRow())
+    else:
         cursor.execute("""UPDATE Articles SET address = ?,
                                               section = ?,
                                               author = ?,
@@ -287,63 +176,115 @@ for line in open(input("Enter file name: ")).readlines():
                                               shares = ?,
                                               hotness = ?,
                                               refreshed = ?
-                                              WHERE idnum = ?""",
-                                             (address,
-                                              article.getSection(),
-                                              article.getAuthor(),
-                                              article.getCoauthors(),
-                                              article.getDate(),
-                                              article.getTime(),
-                                              article.getTitle(),
-                                              article.getLabel(),
-                                              article.getLead(),
-                                              article.getContent(),
-                                              article.getImportant(),
-                                              article.getTagNumber(),
-                                              article.getSimilarity(),
-                                              article.getRelevance(),
-                                              article.getViews(),
-                                              article.getComments(),
-                                              article.getShares(),
-                                              article.getHotness(),
-                                              article.getRefreshed(),
-                                              article.getIdnum()))
-        cursor.execute("SELECT id FROM Articles WHERE idnum = ?", (article.getIdnum(),))
-        id_article = cursor.fetchone()[0]
-        for tag in article.getTags():
-            cursor.execute("SELECT EXISTS (SELECT 1 FROM Tags WHERE tag = ?)", (tag,))
-            if cursor.fetchone()[0] == 0:
-                cursor.execute("INSERT INTO Tags (tag) VALUES (?)", (tag,))
-                cursor.execute("SELECT id FROM Tags WHERE tag = ?", (tag,))
-                id_tag = cursor.fetchone()[0]
-                cursor.execute("INSERT OR REPLACE INTO Relations (id_article, id_tag) VALUES (?, ?)", (id_article, id_tag))
-            else:
-                cursor.execute("SELECT id FROM Tags WHERE tag = ?", (tag,))
-                id_tag = cursor.fetchone()[0]
-                cursor.execute("INSERT OR REPLACE INTO Relations (id_article, id_tag) VALUES (?, ?)", (id_article, id_tag))
-        for comment in comments:
-            cursor.execute("""INSERT OR IGNORE INTO Comments (id_article,
-                                                              address,
-                                                              user,
-                                                              text,
-                                                              date,
-                                                              time,
-                                                              up,
-                                                              down,
-                                                              reply_to,
-                                                              hash_value)
-                                                              VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                                                             (id_article,
-                                                              comment.getAddress(),
-                                                              comment.getUser(),
-                                                              comment.getText(),
-                                                              comment.getDate(),
-                                                              comment.getTime(),
-                                                              comment.getUp(),
-                                                              comment.getDown(),
-                                                              comment.getReplyTo(),
-                                                              comment.getHashValue()))
-        connection.commit()
-connection.close()
+                                              WHERE idnum = ?""", article.getUpdateRow())
+    cursor.execute("SELECT id FROM Articles WHERE idnum = ?", (article.getIdnum(),))
+    row = cursor.fetchone()
+    if row is None: raise LookupError("article not in database") # e.g. deleted since list of URLs was made, item is skipped by writer
+    id_article = row[0]
+    writeRelations(cursor, id_article, article.getTags())
+    cursor.executemany("""INSERT OR IGNORE INTO Comments (id_article,
+                                                          address,
+                                                          user,
+                                                          text,
+                                                          date,
+                                                          time,
+                                                          up,
+                                                          down,
+                                                          reply_to,
+                                                          hash_value)
+                                                          VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", commentRows(id_article, comments))
+    if pages is not None and kind == "article": # stores comments crawl state for next update
+        cursor.execute("INSERT OR REPLACE INTO CommentState (id_article, comments, pages, newest_hash) VALUES (?, ?, ?, ?)",
+                       (id_article, article.getComments(), pages, max(comments, key=commentTime).getHashValue() if comments else None))
+
+if __name__ == "__main__":
+    start = t()
+    client.setCache(ResponseCache("responses.sqlite"))
+    """
+    SQL table schema.
+    """
+    connection = sqlite3.connect("articles - Copy.sqlite")
+    cursor = connection.cursor()
+    migrate(connection) # see module schema; CommentState keeps comments crawl state of articles with dedicated comments website, read here and written by writer thread
+    """
+    Parsing of articles from URLs.
+    """
+    reparse = input("Reparse articles from archive instead of fetching them? Y/N ") in ["Y", "y"]
+    file_name = input("Enter file name (empty for all archived articles): " if reparse else "Enter file name: ")
+    chooseBackend()
+    if reparse: workers = 1 # no fetching
+    else:
+        workers = input("Enter maximum number of concurrent fetchers (default 32): ")
+        workers = int(workers) if workers.isdigit() and int(workers) > 0 else 32
+    processes = input("Enter number of parser processes (default number of CPU cores): ")
+    processes = int(processes) if processes.isdigit() and int(processes) > 0 else None
+    limiter = AdaptiveConcurrency(maximum=workers) # adjusts number of in-flight requests to server load
+    client.setLimiter(limiter)
+    archive = HTMLArchive("archive") # fetched pages are kept for parsing again without fetching
+    dead_letters = DeadLetters("deadletters.sqlite", "articles - Copy.sqlite") # pages that fail to parse are saved for reprocessDeadLetters
+    parsers = ParserPool(getBackend(), processes, archive=None if reparse else archive, dead_letters=dead_letters)
+    writer = Writer("articles - Copy.sqlite", writeArticle, archive=archive, dead_letters=dead_letters)
+    comments_times = list() # (seconds, fetched pages, address) of fetching comments for articles with dedicated comments website
+    unchanged_comments = 0 # articles with dedicated comments website and no new comments since previous update
+    reparsed = 0 # articles reparsed from archive
+    if reparse: pages = archivedArticles(archive, file_name)
+    else: pages = fetchOrdered(articleAddresses(file_name), openArticle, workers, workers)
+    parse_start = t()
+    for i, (address, parsed, error) in enumerate(parsers.articles(pages), 1):
+        if i % 100 == 0: print("{} articles, {:.1f} articles/s{}".format(i, i / (t() - parse_start), "" if reparse else ", " + limiter.report()))
+        if isinstance(error, ExtractionError): # article page could not be parsed, saved to dead letters
+            print("Failed to extract article {}: {}. Saved to dead letters.".format(address, error))
+            continue
+        if error: # article could not be opened due to a transient error (or is not archived), skipped but not marked as removed
+            print("Failed to open article {}: {}. Skipping.".format(address, error))
+            continue
+        if parsed is None: # marks article as removed in database
+            print("Article not found: " + address + " Marking as removed in database.")
+            writer.put(("removed", int(re.findall("\d+$", address)[0])))
+            continue
+        # address (url) of article
+        print(address)
+        # article and comments from article page
+        article, comments, comments_url = parsed
+        pages = None
+        # comments from dedicated comments website
+        if comments_url and reparse:
+            more, pages = parsers.archivedComments(address, archive)
+            comments = comments + more
+        elif comments_url:
+            comments_start = t()
+            cursor.execute("SELECT comments, pages, newest_hash FROM CommentState WHERE id_article = (SELECT id FROM Articles WHERE idnum = ?)", (article.getIdnum(),))
+            try: comments, pages, fetched = getNewComments(parsers, address, comments, comments_url, workers, article.getComments(), cursor.fetchone())
+            except urllib.error.URLError as e: # first comments page could not be opened, comments are added on next update
+                print("Failed to open comments of article {}: {}. Skipping comments.".format(address, e))
+                fetched = None
+            except ExtractionError as e: # first comments page could not be parsed, saved to dead letters
+                print("Failed to extract comments of article {}: {}. Saved to dead letters.".format(address, e))
+                fetched = None
+            comments_time = t() - comments_start
+            if fetched == 0: unchanged_comments += 1
+            elif fetched:
+                comments_times.append((comments_time, fetched, address))
+                print("{} comments from {} pages in {:.2f} seconds.".format(len(comments), fetched, comments_time))
+        writer.put(("reparsed" if reparse else "article", article, comments, pages))
+        reparsed += reparse
+    writer.close()
+    print(writer.report())
+    parsers.close()
+    if reparse: print("Reparsed {} articles from archive in {:.1f} seconds, {:.1f} articles/s with {} parser processes.".format(reparsed, t() - parse_start, reparsed / (t() - parse_start), parsers.processes))
+    print(archive.report())
+    archive.close()
+    print(dead_letters.report())
+    dead_letters.close()
+    connection.close()
 
-print("Finished in %s seconds." % "{0:.3f}".format(t() - start))
\ No newline at end of file
+    print("Comments: fetching skipped for {} articles without new comments.".format(unchanged_comments))
+    if comments_times:
+        longest = max(comments_times)
+        print("Comments: {} pages for {} articles, {:.2f} seconds per article on average, longest {:.2f} seconds ({} pages) for {}.".format(
+            sum(pages for seconds, pages, address in comments_times), len(comments_times), sum(seconds for seconds, pages, address in comments_times) / len(comments_times), *longest))
+    print(timingReport())
+    print(client.report())
+    print(client.cache.report())
+    client.cache.close()
+    print("Finished in %s seconds." % "{0:.3f}".format(t() - start))
\ No newline at end of file
@@ -4,6 +4,8 @@ Stopwords can be selected between regular Slovenian stopwords (stopwords1) and G
 Default: stopwords2
 Words are multiplied by the number of article pageviews, giving total number of impressions for each word, or by hotness score, or counted without multiplier.
 Top 500 most frequent words are output as a TXT file.
+Articles or comments can be selected by a full-text search query (FTS5 syntax: words, "phrases", prefix*, AND/OR/NOT, column: filters),
+answered from the full-text index of the database (see module schema).
 """
 import re
 import sqlite3
@@ -13,6 +15,7 @@ from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 from datetime import date, datetime
 from time import time as t
+from schema import migrate
 
 class DateError(Exception):
     pass
@@ -35,12 +38,14 @@ def binarySearch(iterable, item):
     return False
 
 while True:
-    choice_menu = input("{}{}{}{}".format("1: analyze word frequencies for ALL articles in database\n",
-                                          "2: analyze articles from a given period\n",
-                                          "3: specify custom query WHERE clause (articles)\n",
-                                          "4: specify custom query WHERE clause (comments)\n",
-                                          "X: exit\n"))
-    if choice_menu in ("1", "2", "3", "4", "X", "x"): break
+    choice_menu = input("{}{}{}{}{}{}{}".format("1: analyze word frequencies for ALL articles in database\n",
+                                                "2: analyze articles from a given period\n",
+                                                "3: specify custom query WHERE clause (articles)\n",
+                                                "4: specify custom query WHERE clause (comments)\n",
+                                                "5: full-text search (articles)\n",
+                                                "6: full-text search (comments)\n",
+                                                "X: exit\n"))
+    if choice_menu in ("1", "2", "3", "4", "5", "6", "X", "x"): break
     else: print("\nPlease enter a valid choice.\n\n")
 if choice_menu == "X" or choice_menu == "x": quit()
 else:
@@ -101,12 +106,26 @@ else:
         cursor = connection.cursor()
         if multiplier: data_articles = cursor.execute("SELECT title, label, lead, content, {} FROM Articles WHERE ".format(multiplier) + where).fetchall()
         else: data_articles = cursor.execute("SELECT title, label, lead, content FROM Articles WHERE " + where).fetchall()
-    else: # process articles with a custom WHERE clause for comments
+    elif choice_menu == "4": # process articles with a custom WHERE clause for comments
         where = input("Enter a valid SQLite query WHERE clause for comments: ... WHERE ")
         connection = sqlite3.connect("articles.sqlite")
         cursor = connection.cursor()
         if multiplier: data_articles = cursor.execute("SELECT Comments.text, Articles.{} FROM Comments JOIN Articles ON Comments.id_article = Articles.idnum WHERE ".format(multiplier) + where).fetchall()
         else: data_articles = cursor.execute("SELECT Comments.text FROM Comments WHERE ".format(multiplier) + where).fetchall()
+    elif choice_menu == "5": # process articles matching a full-text search query
+        match = input("Enter a full-text search query for articles (e.g. \"javni razpis\" OR vlad*): ")
+        connection = sqlite3.connect("articles.sqlite")
+        migrate(connection) # builds full-text index if database does not have it yet
+        cursor = connection.cursor()
+        if multiplier: data_articles = cursor.execute("SELECT Articles.title, Articles.label, Articles.lead, Articles.content, Articles.{} FROM ArticlesSearch JOIN Articles ON Articles.id = ArticlesSearch.rowid WHERE ArticlesSearch MATCH ?".format(multiplier), (match,)).fetchall()
+        else: data_articles = cursor.execute("SELECT Articles.title, Articles.label, Articles.lead, Articles.content FROM ArticlesSearch JOIN Articles ON Articles.id = ArticlesSearch.rowid WHERE ArticlesSearch MATCH ?", (match,)).fetchall()
+    else: # process comments matching a full-text search query
+        match = input("Enter a full-text search query for comments (e.g. \"javni razpis\" OR vlad*): ")
+        connection = sqlite3.connect("articles.sqlite")
+        migrate(connection) # builds full-text index if database does not have it yet
+        cursor = connection.cursor()
+        if multiplier: data_articles = cursor.execute("SELECT Comments.text, Articles.{} FROM CommentsSearch JOIN Comments ON Comments.id = CommentsSearch.rowid JOIN Articles ON Comments.id_article = Articles.id WHERE CommentsSearch MATCH ?".format(multiplier), (match,)).fetchall()
+        else: data_articles = cursor.execute("SELECT Comments.text FROM CommentsSearch JOIN Comments ON Comments.id = CommentsSearch.rowid WHERE CommentsSearch MATCH ?", (match,)).fetchall()
 start = t()
 frequencies = dict()
 stopwords1 = ('a','ali','b','bi','bil','bila','bile','bili','bilo','biti','blizu','bo','bodo','bojo','bolj','bom',
@@ -197,8 +216,8 @@ text = ""
 for article in data_articles:
     if multiplier: multiplier_from_article = int(article[-1])
     else: multiplier_from_article = 1
-    if choice_menu == "4":  words = word_tokenize(article[0].lower(), language="slovene")
-    else: words = word_tokenize(" ".join(article[:-1]).lower(), language="slovene")
+    if choice_menu in ("4", "6"):  words = word_tokenize(article[0].lower(), language="slovene")
+    else: words = word_tokenize(" ".join(article[:-1] if multiplier else article).lower(), language="slovene") # last column is multiplier
     text += " ".join(words) + " "
     for word in words:
         if word.isalnum() and not binarySearch(stopwords2, word): frequencies[word] = frequencies.get(word, 0) + multiplier_from_article
@@ -212,7 +231,7 @@ if choice_wordcloud == "1":
     try: plt.savefig("wordcloud_from_{}_to_{}.jpg".format(begin_str, end_str))
     except NameError:
         if choice_menu == "1": plt.savefig("wordcloud.jpg")
-        elif choice_menu == "4": plt.savefig("wordcloud_comments.jpg")
+        elif choice_menu in ("4", "6"): plt.savefig("wordcloud_comments.jpg")
         else: plt.savefig("wordcloud_custom.jpg")
 print()
 for key, value in Counter(frequencies).most_common(10):
@@ -220,7 +239,7 @@ for key, value in Counter(frequencies).most_common(10):
 try: fh = open("most_freq_words_from_{}_to_{}.txt".format(begin_str, end_str), "w")
 except NameError:
     if choice_menu == "1": fh = open("most_freq_words.txt", "w")
-    elif choice_menu == "4": fh = open("most_freq_words_comments.txt", "w")
+    elif choice_menu in ("4", "6"): fh = open("most_freq_words_comments.txt", "w")
     else: fh = open("most_freq_words_custom.txt", "w")
 for i in range(500):
     try: fh.write(Counter(frequencies).most_common()[i][0] + "\n")
@@ -230,12 +249,12 @@ connection.close()
 try: print("\nMost frequent words saved to most_freq_words_from_{}_to_{}.txt".format(begin_str, end_str))
 except NameError:
     if choice_menu == "1": print("\nMost frequent words saved to most_freq_words.txt")
-    elif choice_menu == "4": print("\nMost frequent words saved to most_freq_words_comments.txt")
+    elif choice_menu in ("4", "6"): print("\nMost frequent words saved to most_freq_words_comments.txt")
     else: print("\nMost frequent words saved to most_freq_words_custom.txt")
 if choice_wordcloud == "1":
     try: print("Word cloud image for selection saved as wordcloud_from_{}_to_{}.jpg".format(begin_str, end_str))
     except NameError:
         if choice_menu == "1": print("Word cloud image for selection saved as wordcloud.jpg")
-        elif choice_menu == "4": print("Word cloud image for selection saved as wordcloud_comments.jpg")
+        elif choice_menu in ("4", "6"): print("Word cloud image for selection saved as wordcloud_comments.jpg")
         else: print("Word cloud image for selection saved as wordcloud_custom.jpg")
 print("\n%d articles processed. Finished in %s seconds." % (counter, "{0:.3f}".format(t() - start)))
\ No newline at end of file